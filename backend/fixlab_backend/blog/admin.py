@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Tag, BlogPost, Comment, NewsletterSubscriber
+from .models import Category, Tag, BlogPost, Comment, NewsletterSubscriber, NewsletterDispatch
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -31,4 +31,8 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
     ordering = ('-subscribed_at',)  # order by subscription date
 
 
-
+@admin.register(NewsletterDispatch)
+class NewsletterDispatchAdmin(admin.ModelAdmin):
+    list_display = ('post', 'status', 'sent_count', 'total_recipients', 'progress', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'started_at', 'heartbeat_at', 'finished_at', 'last_subscriber_id', 'last_error')
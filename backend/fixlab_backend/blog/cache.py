@@ -0,0 +1,97 @@
+"""
+Response caching for the public blog API.
+
+Every cached list entry is keyed on a global content version. Any write to
+BlogPost, Category, Tag or Comment bumps the version (see signals.py), which
+orphans all earlier entries at once instead of tracking individual keys.
+
+Detail documents are long-lived and keyed on a per-post version instead, so
+a comment on one post does not throw away every other post's document.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+CONTENT_VERSION_KEY = "blog:content_version"
+CONTENT_MODIFIED_KEY = "blog:content_modified"
+LIST_CACHE_TIMEOUT = getattr(settings, "BLOG_LIST_CACHE_TIMEOUT", 300)
+# Detail documents are invalidated per post; the timeout only bounds staleness
+# of the nested category blog_count for posts in a category a post just left
+DETAIL_CACHE_TIMEOUT = getattr(settings, "BLOG_DETAIL_CACHE_TIMEOUT", 60 * 60)
+
+# Categories and tags change rarely; the content version still expires them on any write
+TAXONOMY_CACHE_TIMEOUT = getattr(settings, "BLOG_TAXONOMY_CACHE_TIMEOUT", 60 * 60)
+
+# Query params that change the blog list response
+LIST_CACHE_PARAMS = ("page", "page_size", "category", "ordering", "search", "pagination", "cursor", "fields")
+
+
+def get_content_version():
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never reuses old keys
+        cache.add(CONTENT_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CONTENT_VERSION_KEY)
+    return version
+
+
+def get_content_modified():
+    """ Unix time of the last blog content change, for Last-Modified headers """
+    modified = cache.get(CONTENT_MODIFIED_KEY)
+    if modified is None:
+        # Unknown after eviction: claim "now" so clients revalidate rather than go stale
+        modified = int(time.time())
+        cache.add(CONTENT_MODIFIED_KEY, modified, None)
+    return modified
+
+
+def bump_content_version():
+    cache.set(CONTENT_MODIFIED_KEY, int(time.time()), None)
+    try:
+        return cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        # Key was evicted; a fresh clock-based seed is newer than anything cached
+        return get_content_version()
+
+
+def make_cache_key(prefix, request, params):
+    """ Versioned key for a GET request, built from the host and the given query params """
+    parts = [request.get_host()]
+    parts += [f"{name}={request.query_params.get(name, '')}" for name in params]
+    digest = hashlib.md5("&".join(parts).encode()).hexdigest()
+    return f"blog:{prefix}:{get_content_version()}:{digest}"
+
+
+def blog_list_cache_key(request):
+    return make_cache_key("list", request, LIST_CACHE_PARAMS)
+
+
+def taxonomy_cache_key(name):
+    """ Key of the serialized category or tag snapshot; neither depends on the request """
+    return f"blog:taxonomy:{name}:{get_content_version()}"
+
+
+def related_cache_key(request, post_id):
+    return make_cache_key(f"related:{post_id}", request, ("fields",))
+
+
+def _detail_version_key(post_id):
+    return f"blog:detail_version:{post_id}"
+
+
+def blog_detail_cache_key(request, post_id):
+    """ Key of the serialized detail document of one post, as seen from this host """
+    version = cache.get(_detail_version_key(post_id))
+    if version is None:
+        version = time.time_ns()
+        cache.add(_detail_version_key(post_id), version, None)
+    return f"blog:detail:{post_id}:{version}:{request.get_host()}"
+
+
+def invalidate_post_details(post_ids):
+    """ Orphan the cached detail documents of the given posts """
+    version = time.time_ns()
+    cache.set_many({_detail_version_key(post_id): version for post_id in post_ids}, None)
@@ -0,0 +1,94 @@
+"""
+Optional write-behind buffer for comments (settings.BLOG_COMMENT_BUFFERED).
+
+Accepted comments are held in memory and written with one bulk_create once
+BUFFER_SIZE comments are waiting or the oldest has waited FLUSH_INTERVAL
+seconds, so a burst of submissions costs a handful of inserts instead of
+one per comment. A buffer is per process and is flushed on shutdown; a
+worker that is killed outright loses what it was holding, which is why the
+mode is off by default.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from .cache import bump_content_version, invalidate_post_details
+from .models import Comment
+
+
+logger = logging.getLogger(__name__)
+
+BUFFER_SIZE = getattr(settings, "BLOG_COMMENT_BUFFER_SIZE", 50)
+FLUSH_INTERVAL = getattr(settings, "BLOG_COMMENT_FLUSH_INTERVAL", 5)   # seconds
+
+
+class CommentBuffer:
+    def __init__(self, size=BUFFER_SIZE, interval=FLUSH_INTERVAL):
+        self.size = size
+        self.interval = interval
+        self._pending = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, **fields):
+        """ Queue one comment; flushes inline when the buffer is full """
+        with self._lock:
+            self._pending.append(Comment(**fields))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self.size
+            self._start_flusher()
+        if full:
+            self.flush()
+
+    def _start_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run, name="comment-buffer", daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.interval
+            if due:
+                self.flush()
+                # The flusher thread owns its own connection; don't leave it dangling
+                close_old_connections()
+
+    def flush(self):
+        """ Write everything buffered so far; returns the number of comments saved """
+        with self._lock:
+            batch, self._pending, self._oldest = self._pending, [], None
+        if not batch:
+            return 0
+
+        try:
+            Comment.objects.bulk_create(batch, batch_size=self.size)
+            saved = batch
+        except DatabaseError:
+            # Usually one bad row (e.g. its post was deleted meanwhile): save
+            # the rest one by one rather than losing the whole batch
+            logger.exception("Bulk insert of %s buffered comments failed, retrying row by row", len(batch))
+            saved = []
+            for comment in batch:
+                try:
+                    comment.save()
+                    saved.append(comment)
+                except DatabaseError:
+                    logger.exception("Dropping buffered comment for post %s", comment.post_id)
+
+        if saved:
+            # bulk_create skips post_save, so invalidate what the signals would have
+            bump_content_version()
+            invalidate_post_details({comment.post_id for comment in saved})
+        return len(saved)
+
+
+comment_buffer = CommentBuffer()
+atexit.register(comment_buffer.flush)
@@ -0,0 +1,55 @@
+"""
+Conditional GET (ETag / Last-Modified) for the public blog API.
+
+Validators come from the global content version in blog/cache.py, so a
+revalidation that ends in 304 Not Modified costs no query and no
+serialization.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_content_modified, get_content_version
+
+
+# How long browsers and the CDN may reuse a response before revalidating
+BLOG_API_MAX_AGE = getattr(settings, "BLOG_API_MAX_AGE", 60)
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET/HEAD with 304 when If-None-Match / If-Modified-Since still
+    match, and adds ETag, Last-Modified and Cache-Control to 200 responses.
+    """
+    max_age = BLOG_API_MAX_AGE
+
+    def get_etag(self, request):
+        # The URL covers path params (post id, page, filters); the host covers absolute links
+        raw = f"{get_content_version()}|{request.get_host()}|{request.get_full_path()}"
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def get_last_modified(self, request):
+        return get_content_modified()
+
+    def set_validators(self, response, etag, last_modified):
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=self.max_age)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        etag = self.get_etag(request)
+        last_modified = self.get_last_modified(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, last_modified)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.set_validators(response, etag, last_modified)
+        return response
@@ -0,0 +1,121 @@
+"""
+Responsive variants of BlogPost.image.
+
+On Cloudinary every variant is just a transformation in the delivery URL
+(width limit, automatic format and quality), so nothing is generated. With
+local file storage the variants are WebP files under `derivatives/`, made
+with Pillow by the `generate_image_variants` command; until a variant
+exists its URL falls back to the original upload.
+
+Variant URLs are computed once per stored image and cached, so serializers
+never touch storage or rebuild URLs per request.
+"""
+import hashlib
+import posixpath
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.utils.functional import LazyObject, empty
+
+# name -> max width in pixels; images are never upscaled
+VARIANTS = (("thumbnail", 320), ("card", 640), ("hero", 1280))
+WEBP_QUALITY = getattr(settings, "BLOG_IMAGE_QUALITY", 80)
+DERIVATIVES_DIR = "derivatives"
+# Local variants not generated yet are looked up again after this long
+PENDING_CACHE_TIMEOUT = 5 * 60
+
+
+def is_cloudinary(storage):
+    if isinstance(storage, LazyObject):
+        # default_storage: look at the backend it wraps
+        if storage._wrapped is empty:
+            storage._setup()
+        storage = storage._wrapped
+    return type(storage).__module__.startswith("cloudinary_storage")
+
+
+def cloudinary_variant_url(url, width):
+    """ Insert a width-limit / auto format / auto quality transformation into a delivery URL """
+    return url.replace("/upload/", f"/upload/c_limit,w_{width},f_auto,q_auto/", 1)
+
+
+def derivative_name(name, variant):
+    stem = posixpath.splitext(name)[0]
+    return f"{DERIVATIVES_DIR}/{variant}/{stem}.webp"
+
+
+def _cache_key(name):
+    return f"blog:image_variants:{hashlib.md5(name.encode()).hexdigest()}"
+
+
+def image_variants(image):
+    """
+    {variant: url} for a stored image, plus the original under "original".
+    URLs are whatever the storage returns (relative for local storage).
+    """
+    key = _cache_key(image.name)
+    variants = cache.get(key)
+    if variants is not None:
+        return variants
+
+    storage = image.storage
+    original = image.url
+    variants = {"original": original}
+    pending = False
+    if is_cloudinary(storage):
+        for variant, width in VARIANTS:
+            variants[variant] = cloudinary_variant_url(original, width)
+    else:
+        for variant, _ in VARIANTS:
+            name = derivative_name(image.name, variant)
+            if storage.exists(name):
+                variants[variant] = storage.url(name)
+            else:
+                variants[variant] = original
+                pending = True
+
+    cache.set(key, variants, PENDING_CACHE_TIMEOUT if pending else None)
+    return variants
+
+
+def srcset(variants):
+    return ", ".join(f"{variants[variant]} {width}w" for variant, width in VARIANTS)
+
+
+def generate_variants(image, force=False):
+    """
+    Write the missing local WebP variants of `image` with Pillow; returns how
+    many were written. A no-op on Cloudinary, which transforms on delivery.
+    """
+    storage = image.storage
+    if is_cloudinary(storage):
+        return 0
+
+    todo = [
+        (variant, width) for variant, width in VARIANTS
+        if force or not storage.exists(derivative_name(image.name, variant))
+    ]
+    if not todo:
+        return 0
+
+    with storage.open(image.name, "rb") as f:
+        source = ImageOps.exif_transpose(Image.open(f))
+        source.load()
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+    for variant, width in todo:
+        resized = source.copy()
+        resized.thumbnail((width, width * 10), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+        name = derivative_name(image.name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(buffer.getvalue()))
+
+    cache.delete(_cache_key(image.name))
+    return len(todo)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_content_version, invalidate_post_details
+from blog.images import generate_variants, is_cloudinary
+from blog.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = "Generate local WebP image variants (thumbnail, card, hero) for blog posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and pick up newly uploaded images.")
+        parser.add_argument("--interval", type=int, default=60,
+                            help="Seconds to sleep between scans when --loop is set.")
+        parser.add_argument("--force", action="store_true",
+                            help="Regenerate variants that already exist.")
+
+    def handle(self, *args, **options):
+        if is_cloudinary(BlogPost._meta.get_field("image").storage):
+            self.stdout.write("Images are on Cloudinary, which transforms on delivery; nothing to do.")
+            return
+
+        while True:
+            written, updated = 0, []
+            for post in BlogPost.objects.exclude(image="").exclude(image__isnull=True).only("id", "image").iterator():
+                try:
+                    count = generate_variants(post.image, force=options["force"])
+                except (OSError, ValueError) as e:
+                    self.stderr.write(f"Post {post.id}: could not process {post.image.name}: {e}")
+                    continue
+                if count:
+                    written += count
+                    updated.append(post.id)
+            if updated:
+                # Cached responses still point at the original uploads
+                invalidate_post_details(updated)
+                bump_content_version()
+                self.stdout.write(f"Wrote {written} image variants for {len(updated)} posts")
+            if not options["loop"]:
+                break
+            options["force"] = False
+            time.sleep(options["interval"])
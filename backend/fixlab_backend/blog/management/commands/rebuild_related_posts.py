@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.related import TOP_K, rebuild_related, rebuild_related_if_dirty
+
+
+class Command(BaseCommand):
+    help = "Precompute the related posts of every published post when posts have changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and rebuild whenever posts change.")
+        parser.add_argument("--interval", type=int, default=300,
+                            help="Seconds to sleep between checks when --loop is set.")
+        parser.add_argument("--top-k", type=int, default=TOP_K,
+                            help="Related posts stored per post.")
+        parser.add_argument("--force", action="store_true",
+                            help="Rebuild even if no post changed.")
+
+    def handle(self, *args, **options):
+        while True:
+            if options["force"]:
+                covered = rebuild_related(options["top_k"])
+                options["force"] = False
+            else:
+                covered = rebuild_related_if_dirty(options["top_k"])
+            if covered is not None:
+                self.stdout.write(f"Rebuilt related posts for {covered} posts")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
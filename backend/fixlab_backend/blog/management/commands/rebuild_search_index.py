@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogPost
+from blog.search import index_post
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog search index for every post."
+
+    def handle(self, *args, **options):
+        count = 0
+        for post in BlogPost.objects.only("id", "title", "excerpt", "author", "content").iterator(chunk_size=200):
+            index_post(post)
+            count += 1
+        self.stdout.write(f"Indexed {count} posts")
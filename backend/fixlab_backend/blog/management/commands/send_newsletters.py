@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.newsletter import BATCH_SIZE, process_pending_dispatches
+
+
+class Command(BaseCommand):
+    help = "Send queued new-post newsletters to active subscribers in SendGrid batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and poll for new dispatches.")
+        parser.add_argument("--interval", type=int, default=30,
+                            help="Seconds to sleep between polls when --loop is set.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help="Subscribers per SendGrid request (max 1000).")
+        parser.add_argument("--retry-failed", action="store_true",
+                            help="Also resume dispatches that stopped on a failed batch.")
+
+    def handle(self, *args, **options):
+        batch_size = min(options["batch_size"], 1000)
+        while True:
+            for dispatch in process_pending_dispatches(options["retry_failed"], batch_size):
+                self.stdout.write(
+                    f"{dispatch.post.title}: {dispatch.status}, "
+                    f"{dispatch.sent_count}/{dispatch.total_recipients} sent ({dispatch.progress}%)"
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:15
+
+import re
+from collections import Counter
+from html import unescape
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+
+# A frozen copy of the blog.search tokenizer as it was when this migration
+# was written; later changes to blog.search must not alter what it backfills
+FIELD_WEIGHTS = (("title", 10), ("excerpt", 4), ("author", 3), ("content", 1))
+MAX_TERM_FREQUENCY = 5
+MAX_TERM_LENGTH = 64
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    words = (word[:MAX_TERM_LENGTH] for word in TOKEN_RE.findall(unescape(strip_tags(text or "")).lower()))
+    return [word for word in words if len(word) > 1 and word not in STOP_WORDS]
+
+
+def build_terms(post):
+    terms = Counter()
+    for field, field_weight in FIELD_WEIGHTS:
+        for term, count in Counter(tokenize(getattr(post, field, ""))).items():
+            terms[term] += field_weight * min(count, MAX_TERM_FREQUENCY)
+    return terms
+
+
+def index_existing_posts(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    SearchTerm = apps.get_model('blog', 'SearchTerm')
+    for post in BlogPost.objects.iterator(chunk_size=200):
+        SearchTerm.objects.bulk_create(
+            SearchTerm(post_id=post.id, term=term, weight=weight)
+            for term, weight in build_terms(post).items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_newsletterdispatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='blog.blogpost')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'post'), name='blog_searchterm_term_post_uniq')],
+            },
+        ),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_blogpost_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'is_public', 'created_at'], name='blog_comment_post_pub_idx'),
+        ),
+    ]
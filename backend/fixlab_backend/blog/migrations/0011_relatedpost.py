@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_comment_blog_comment_post_pub_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='related_dirty',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_posts', to='blog.blogpost')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='blog.blogpost')),
+            ],
+            options={
+                'ordering': ['post', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'rank'), name='blog_relatedpost_post_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletterdispatch',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:10
+#
+# Catches the history up with models.py: content became a RichTextField and
+# image lost its upload_to. Neither changes the database schema.
+
+import ckeditor.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_newsletterdispatch_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blogpost',
+            name='content',
+            field=ckeditor.fields.RichTextField(),
+        ),
+        migrations.AlterField(
+            model_name='blogpost',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to=''),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_blogpost_content_image_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['is_published', 'created_at'], name='blog_post_pub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['is_published', 'title'], name='blog_post_pub_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['is_published', 'category', 'created_at'], name='blog_post_pub_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['is_published', 'category', 'title'], name='blog_post_pub_cat_title_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
 from django.utils import timezone
-from django.utils.text import slugify
 from ckeditor.fields import RichTextField
 
+from .slugs import save_with_unique_slug
+
 
 
 class Category(models.Model):
@@ -16,14 +17,7 @@ class Category(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            # If a category with the same slug exists, append timestamp
-            if Category.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{timezone.now().strftime('%Y%m%d%H%M%S')}"
-            self.slug = slug
-        super().save(*args, **kwargs)
+        save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
 
 
 class Tag(models.Model):
@@ -37,14 +31,7 @@ class Tag(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            # Ensure uniqueness
-            if Tag.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{timezone.now().strftime('%Y%m%d%H%M%S')}"
-            self.slug = slug
-        super().save(*args, **kwargs)
+        save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
 
 
 class BlogPost(models.Model):
@@ -59,20 +46,67 @@ class BlogPost(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     is_published = models.BooleanField(default=True)
+    # Set whenever something that feeds related-post scores changes; cleared
+    # by the rebuild_related_posts job (see blog/related.py)
+    related_dirty = models.BooleanField(default=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        # Back the orderings whitelisted in views.BLOG_ORDERINGS, with and
+        # without the category filter. The primary key is implicitly the last
+        # index column, so the (field, id) tie-break is read in index order.
+        # MySQL/TiDB render the public filter as `is_published = true`, an
+        # equality the is_published-prefixed indexes serve. SQLite renders a
+        # bare boolean column, which cannot be a prefix, and uses the others
+        # (as do unfiltered admin listings).
+        indexes = [
+            models.Index(fields=["is_published", "created_at"], name="blog_post_pub_created_idx"),
+            models.Index(fields=["is_published", "title"], name="blog_post_pub_title_idx"),
+            models.Index(fields=["is_published", "category", "created_at"], name="blog_post_pub_cat_created_idx"),
+            models.Index(fields=["is_published", "category", "title"], name="blog_post_pub_cat_title_idx"),
+            models.Index(fields=["created_at"], name="blog_post_created_idx"),
+            models.Index(fields=["title"], name="blog_post_title_idx"),
+            models.Index(fields=["category", "created_at"], name="blog_post_cat_created_idx"),
+            models.Index(fields=["category", "title"], name="blog_post_cat_title_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            # Append timestamp for uniqueness
-            unique_suffix = timezone.now().strftime("%Y%m%d%H%M%S")
-            self.slug = f"{base_slug}-{unique_suffix}"
-        super().save(*args, **kwargs)
+        save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
+
+
+class SearchTerm(models.Model):
+    """ Inverted index entry: one token of a post and how much it counts towards ranking """
+    post = models.ForeignKey(BlogPost, related_name="search_terms", on_delete=models.CASCADE)
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "post"], name="blog_searchterm_term_post_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.weight}) -> {self.post_id}"
+
+
+class RelatedPost(models.Model):
+    """ Precomputed top-K related posts of a post, best first """
+    post = models.ForeignKey(BlogPost, related_name="related_posts", on_delete=models.CASCADE)
+    related = models.ForeignKey(BlogPost, related_name="related_from", on_delete=models.CASCADE)
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["post", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["post", "rank"], name="blog_relatedpost_post_rank_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.3f})"
 
 
 class Comment(models.Model):
@@ -85,6 +119,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # Public comments of a post, oldest first, and "since" polling
+            models.Index(fields=["post", "is_public", "created_at"], name="blog_comment_post_pub_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.name} on {self.post.title}"
@@ -98,3 +136,40 @@ class NewsletterSubscriber(models.Model):
 
     def __str__(self):
         return self.email
+
+
+class NewsletterDispatch(models.Model):
+    """ Tracks the background fan-out of a new blog post to newsletter subscribers """
+    STATUS_CHOICES = (
+        ("pending", "Pending"),       # Queued by the post_save signal
+        ("running", "Running"),       # Picked up by the send_newsletters worker
+        ("completed", "Completed"),   # Every active subscriber was processed
+        ("failed", "Failed"),         # A batch failed; resumes from the cursor
+    )
+
+    post = models.ForeignKey(BlogPost, related_name="newsletter_dispatches", on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    # Keyset cursor: id of the last subscriber handled, so a dispatch can resume
+    last_subscriber_id = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker after every batch; a running dispatch whose
+    # heartbeat is too old belongs to a dead worker and is claimed again
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Newsletter for {self.post.title} ({self.status})"
+
+    @property
+    def progress(self):
+        """ Percentage of recipients processed so far """
+        if not self.total_recipients:
+            return 100 if self.status == "completed" else 0
+        return min(100, round(self.sent_count * 100 / self.total_recipients))
@@ -0,0 +1,156 @@
+"""
+Background fan-out of new blog posts to newsletter subscribers.
+
+The post_save signal only records a NewsletterDispatch row; the
+`send_newsletters` management command picks pending dispatches up, streams
+active subscribers in keyset-ordered chunks and hands each chunk to the
+shared transport, which sends it as one SendGrid request with a
+personalization per subscriber. A running dispatch whose worker stopped
+sending heartbeats for CLAIM_TIMEOUT is picked up again from its cursor.
+"""
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.html import escape
+
+from notifications.emails import render_email, substitutions
+from notifications.transport import EmailMessage, send_many
+
+from .models import NewsletterDispatch, NewsletterSubscriber
+
+
+# SendGrid allows up to 1000 personalizations per request
+BATCH_SIZE = getattr(settings, "NEWSLETTER_BATCH_SIZE", 500)
+# A 'running' dispatch without a heartbeat for this long belongs to a worker that died
+CLAIM_TIMEOUT = getattr(settings, "NEWSLETTER_CLAIM_TIMEOUT", 10 * 60)   # seconds
+
+EMAIL_TOKEN = "-email-"
+UNSUBSCRIBE_TOKEN = "-unsubscribe_url-"
+UNSUBSCRIBE_URL = "https://www.services.fixlabtech.com/api/blog/unsubscribe/{email}/"
+
+
+def unsubscribe_url(email):
+    # ' and other characters legal in an address must not end the href
+    return UNSUBSCRIBE_URL.format(email=quote(email, safe="@"))
+
+
+def iter_subscriber_batches(after_id=0, batch_size=BATCH_SIZE):
+    """
+    Yield lists of (id, email) for active subscribers with id > after_id.
+
+    Uses keyset pagination on the primary key, so each chunk is a single
+    indexed range read and memory stays bounded by batch_size.
+    """
+    last_id = after_id
+    while True:
+        batch = list(
+            NewsletterSubscriber.objects.filter(is_active=True, id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "email")[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def build_post_email(post):
+    """ The email shared by every recipient of a post's newsletter, with tokens for theirs """
+    title = escape(post.title)
+    return render_email(
+        subject=f"📢 New Blog Post: {post.title}",
+        title=f"New Blog Published: {post.title}",
+        greeting=EMAIL_TOKEN,
+        message=f"We’ve just published a new blog post on our platform! 🎉<br><br>"
+                f"<strong>{title}</strong><br><br>"
+                f"<a href='https://www.fixlabtech.com/blog_details?id={post.id}' "
+                f"style='display:inline-block; padding:10px 20px; background:#0b5394; color:#fff; border-radius:5px; text-decoration:none;'>"
+                f"Read Full Article</a>",
+        footer=f"If you no longer wish to receive these updates, you can unsubscribe anytime:<br>"
+               f"<a href='{UNSUBSCRIBE_TOKEN}'>Unsubscribe</a>",
+        tokens=(EMAIL_TOKEN, UNSUBSCRIBE_TOKEN),
+    )
+
+
+def claimable(statuses, now):
+    """ Dispatches in `statuses`, plus running ones whose worker stopped heartbeating """
+    stale = now - timedelta(seconds=CLAIM_TIMEOUT)
+    return Q(status__in=statuses) | Q(status="running", heartbeat_at__lt=stale) | Q(
+        status="running", heartbeat_at__isnull=True, started_at__lt=stale
+    )
+
+
+def claim_dispatch(dispatch_id, statuses=("pending",)):
+    """
+    Atomically move a dispatch to 'running'.
+
+    Returns the dispatch if this worker won the claim, otherwise None, so two
+    workers never send the same newsletter.
+    """
+    now = timezone.now()
+    claimed = NewsletterDispatch.objects.filter(claimable(statuses, now), id=dispatch_id).update(
+        status="running", started_at=now, heartbeat_at=now
+    )
+    if not claimed:
+        return None
+    return NewsletterDispatch.objects.select_related("post").get(id=dispatch_id)
+
+
+def run_dispatch(dispatch, batch_size=BATCH_SIZE):
+    """
+    Send the newsletter for a claimed dispatch, saving progress after every batch.
+
+    A failed batch stops the dispatch without moving the cursor, so resuming
+    it later starts again from the first subscriber that was not reached.
+    """
+    if not dispatch.total_recipients:
+        dispatch.total_recipients = NewsletterSubscriber.objects.filter(is_active=True).count()
+        dispatch.save(update_fields=["total_recipients"])
+
+    email = build_post_email(dispatch.post)
+
+    for batch in iter_subscriber_batches(dispatch.last_subscriber_id, batch_size):
+        messages = [
+            EmailMessage(email.subject, email.html, address, substitutions({
+                EMAIL_TOKEN: address,
+                UNSUBSCRIBE_TOKEN: unsubscribe_url(address),
+            }), email.text)
+            for _, address in batch
+        ]
+        failures = [error for ok, error in send_many(messages) if not ok]
+        if failures:
+            dispatch.status = "failed"
+            dispatch.last_error = failures[0]
+            dispatch.save(update_fields=["status", "last_error"])
+            return dispatch
+
+        dispatch.sent_count += len(batch)
+        dispatch.last_subscriber_id = batch[-1][0]
+        dispatch.heartbeat_at = timezone.now()
+        dispatch.save(update_fields=["sent_count", "last_subscriber_id", "heartbeat_at"])
+
+    dispatch.status = "completed"
+    dispatch.last_error = ""
+    dispatch.finished_at = timezone.now()
+    dispatch.save(update_fields=["status", "last_error", "finished_at"])
+    return dispatch
+
+
+def process_pending_dispatches(retry_failed=False, batch_size=BATCH_SIZE):
+    """ Run every dispatch waiting to be sent; returns the dispatches processed """
+    statuses = ("pending", "failed") if retry_failed else ("pending",)
+    ids = list(
+        NewsletterDispatch.objects.filter(claimable(statuses, timezone.now()))
+        .order_by("created_at")
+        .values_list("id", flat=True)
+    )
+
+    processed = []
+    for dispatch_id in ids:
+        dispatch = claim_dispatch(dispatch_id, statuses)
+        if dispatch is not None:
+            processed.append(run_dispatch(dispatch, batch_size))
+    return processed
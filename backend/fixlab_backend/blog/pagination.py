@@ -1,6 +1,96 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 50
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (ordering field, id).
+
+    Each page is `WHERE (field, id) < (last_field, last_id) ORDER BY field, id
+    LIMIT n+1`, so it never runs a COUNT(*) or skips an OFFSET, and deep pages
+    cost the same as the first one. The view may define
+    `get_keyset_ordering()` returning e.g. "-created_at" or "title".
+    """
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, view):
+        if view is not None and hasattr(view, 'get_keyset_ordering'):
+            return view.get_keyset_ordering() or self.default_ordering
+        return self.default_ordering
+
+    def encode_cursor(self, obj):
+        value = self.field.value_to_string(obj)
+        raw = json.dumps([value, obj.pk]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return self.field.to_python(value), int(pk)
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(view)
+        descending = ordering.startswith('-')
+        field_name = ordering.lstrip('-')
+        self.field = queryset.model._meta.get_field(field_name)
+
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{field_name}', f'{prefix}pk')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            op = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field_name}__{op}': value}) | Q(**{field_name: value, f'pk__{op}': pk})
+            )
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+
+class CommentKeysetPagination(KeysetPagination):
+    """ Oldest-first comment pages on (created_at, id) """
+    page_size = 20
+    max_page_size = 100
+    default_ordering = 'created_at'
@@ -0,0 +1,152 @@
+"""
+Related-posts engine.
+
+Candidates are scored from three signals:
+
+* tag overlap, as the cosine of the two posts' tag sets;
+* a flat bonus for sharing a category;
+* optionally, TF-IDF cosine similarity of the posts' text, reusing the
+  SearchTerm index so no text is re-tokenized here.
+
+The top-K per published post are precomputed by the `rebuild_related_posts`
+command whenever a post is flagged `related_dirty` (see signals.py) and
+stored in RelatedPost, so serving them is one indexed lookup. Scores are
+built by walking shared tags, categories and terms rather than every pair
+of posts, which keeps a full rebuild to seconds for a blog-sized corpus.
+"""
+import heapq
+import logging
+import math
+from collections import defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import bump_content_version
+from .models import BlogPost, RelatedPost, SearchTerm
+
+
+logger = logging.getLogger(__name__)
+
+TOP_K = getattr(settings, "BLOG_RELATED_TOP_K", 5)
+TAG_WEIGHT = getattr(settings, "BLOG_RELATED_TAG_WEIGHT", 1.0)
+CATEGORY_WEIGHT = getattr(settings, "BLOG_RELATED_CATEGORY_WEIGHT", 0.5)
+# Set to 0 to rank on tags and category alone
+TEXT_WEIGHT = getattr(settings, "BLOG_RELATED_TEXT_WEIGHT", 1.0)
+# Terms found in more than this share of posts say little and would pair up everything
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+
+def _add_pair_scores(scores, groups, weigh):
+    """ Add weigh(a, b) to every pair of posts that share a group """
+    for post_ids in groups.values():
+        for a, b in combinations(sorted(post_ids), 2):
+            scores[(a, b)] += weigh(a, b)
+
+
+def _text_scores(post_ids):
+    """ {(a, b): tf-idf cosine} for post pairs sharing at least one informative term """
+    vectors = defaultdict(dict)
+    postings = defaultdict(list)
+    for post_id, term, weight in SearchTerm.objects.filter(post_id__in=post_ids).values_list(
+        "post_id", "term", "weight"
+    ).iterator(chunk_size=2000):
+        vectors[post_id][term] = weight
+        postings[term].append(post_id)
+
+    total = len(post_ids)
+    idf = {term: math.log(total / len(ids)) for term, ids in postings.items()}
+    norms = {
+        post_id: math.sqrt(sum((weight * idf[term]) ** 2 for term, weight in terms.items()))
+        for post_id, terms in vectors.items()
+    }
+
+    dots = defaultdict(float)
+    for term, ids in postings.items():
+        if len(ids) < 2 or len(ids) > MAX_DOCUMENT_FREQUENCY * total:
+            continue
+        for a, b in combinations(sorted(ids), 2):
+            dots[(a, b)] += vectors[a][term] * vectors[b][term] * idf[term] ** 2
+
+    return {
+        pair: dot / (norms[pair[0]] * norms[pair[1]])
+        for pair, dot in dots.items()
+        if norms[pair[0]] and norms[pair[1]]
+    }
+
+
+def compute_related(top_k=TOP_K, text_weight=TEXT_WEIGHT):
+    """ {post_id: [(related_id, score), ...]} for every published post, best first """
+    posts = dict(BlogPost.objects.filter(is_published=True).values_list("id", "created_at"))
+    if len(posts) < 2:
+        return {}
+
+    tags = defaultdict(set)
+    for post_id, tag_id in BlogPost.tags.through.objects.filter(blogpost_id__in=posts).values_list(
+        "blogpost_id", "tag_id"
+    ):
+        tags[post_id].add(tag_id)
+
+    by_tag = defaultdict(list)
+    for post_id, tag_ids in tags.items():
+        for tag_id in tag_ids:
+            by_tag[tag_id].append(post_id)
+
+    by_category = defaultdict(list)
+    for post_id, category_id in BlogPost.objects.filter(id__in=posts, category__isnull=False).values_list(
+        "id", "category_id"
+    ):
+        by_category[category_id].append(post_id)
+
+    scores = defaultdict(float)
+    _add_pair_scores(scores, by_tag, lambda a, b: TAG_WEIGHT / math.sqrt(len(tags[a]) * len(tags[b])))
+    _add_pair_scores(scores, by_category, lambda a, b: CATEGORY_WEIGHT)
+    if text_weight:
+        for pair, similarity in _text_scores(list(posts)).items():
+            scores[pair] += text_weight * similarity
+
+    candidates = defaultdict(list)
+    for (a, b), score in scores.items():
+        candidates[a].append((score, posts[b], b))
+        candidates[b].append((score, posts[a], a))
+
+    # Ties go to the newer post
+    return {
+        post_id: [(related_id, score) for score, _, related_id in heapq.nlargest(top_k, entries)]
+        for post_id, entries in candidates.items()
+    }
+
+
+def rebuild_related(top_k=TOP_K):
+    """ Recompute and store every post's related posts; returns the number of posts covered """
+    dirty = list(BlogPost.objects.filter(related_dirty=True).values_list("id", flat=True))
+    # Clear the flags first: anything edited while we compute is flagged again for the next run
+    BlogPost.objects.filter(id__in=dirty).update(related_dirty=False)
+    try:
+        ranking = compute_related(top_k)
+        with transaction.atomic():
+            RelatedPost.objects.all().delete()
+            RelatedPost.objects.bulk_create(
+                (
+                    RelatedPost(post_id=post_id, related_id=related_id, score=score, rank=rank)
+                    for post_id, entries in ranking.items()
+                    for rank, (related_id, score) in enumerate(entries, start=1)
+                ),
+                batch_size=500,
+            )
+    except Exception:
+        BlogPost.objects.filter(id__in=dirty).update(related_dirty=True)
+        raise
+
+    # Cached related responses and their ETags hang off the content version
+    bump_content_version()
+    logger.info("Rebuilt related posts for %s posts", len(ranking))
+    return len(ranking)
+
+
+def rebuild_related_if_dirty(top_k=TOP_K):
+    """ Rebuild only when some post changed since the last run; returns posts covered or None """
+    if not BlogPost.objects.filter(related_dirty=True).exists():
+        return None
+    return rebuild_related(top_k)
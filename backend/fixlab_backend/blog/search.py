@@ -0,0 +1,121 @@
+"""
+Inverted-index search for blog posts.
+
+Each post is tokenized on save into SearchTerm rows (term, weight). A search
+looks tokens up through the (term, post) unique index instead of scanning
+post content: every query token must match, the last one as a prefix so
+results update while the user types (even a single letter or stop word),
+and posts are ranked by the summed weight of the matched terms. It is
+plain SQL, so it behaves the same on TiDB/MySQL in production and SQLite
+in tests.
+"""
+import re
+from collections import Counter
+from html import unescape
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+from django.utils.html import strip_tags
+
+from .models import SearchTerm
+
+
+# Matches in the title matter more than matches deep in the body
+FIELD_WEIGHTS = (("title", 10), ("excerpt", 4), ("author", 3), ("content", 1))
+# Cap repeated words so long posts cannot win on sheer length
+MAX_TERM_FREQUENCY = 5
+MAX_QUERY_TOKENS = 8
+MAX_RESULTS = 500
+MAX_TERM_LENGTH = SearchTerm._meta.get_field("term").max_length
+
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def words(text):
+    """ Lowercased words of plain or HTML text """
+    return [word[:MAX_TERM_LENGTH] for word in TOKEN_RE.findall(unescape(strip_tags(text or "")).lower())]
+
+
+def tokenize(text):
+    """ Lowercased word tokens of plain or HTML text, without stop words """
+    return [word for word in words(text) if len(word) > 1 and word not in STOP_WORDS]
+
+
+def query_tokens(query):
+    """
+    Tokens of a search query. The last word is kept even when it is a single
+    character or a stop word: the user may still be typing it, and as a
+    prefix "t" or "the" still matches indexed words such as "theme".
+    """
+    query_words = words(query)
+    if not query_words:
+        return []
+    *complete, partial = query_words
+    complete = [token for token in dict.fromkeys(tokenize(" ".join(complete))) if token != partial]
+    return complete[:MAX_QUERY_TOKENS - 1] + [partial]
+
+
+def build_terms(post):
+    """ {term: weight} for a post, summing field weights over capped term frequencies """
+    terms = Counter()
+    for field, field_weight in FIELD_WEIGHTS:
+        for term, count in Counter(tokenize(getattr(post, field, ""))).items():
+            terms[term] += field_weight * min(count, MAX_TERM_FREQUENCY)
+    return terms
+
+
+def index_post(post):
+    """ Replace the index entries of one post """
+    with transaction.atomic():
+        SearchTerm.objects.filter(post=post).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(post=post, term=term, weight=weight) for term, weight in build_terms(post).items()
+        )
+
+
+def search_posts(queryset, query):
+    """
+    Restrict `queryset` to posts matching every token of `query` and annotate
+    a `search_rank`, highest first. The last token matches as a prefix.
+    """
+    tokens = query_tokens(query)
+    if not tokens:
+        # No words at all (e.g. only punctuation): plain substring match
+        query = (query or "").strip()
+        if not query:
+            return queryset.none()
+        return queryset.filter(
+            Q(title__icontains=query) | Q(excerpt__icontains=query) | Q(author__icontains=query)
+        ).annotate(search_rank=Value(0, output_field=IntegerField())).order_by("-created_at")
+
+    token_filters = [Q(term=token) for token in tokens[:-1]] + [Q(term__startswith=tokens[-1])]
+    any_token = Q()
+    for token_filter in token_filters:
+        any_token |= token_filter
+
+    # One row per post: total weight plus a 0/1 flag per token, keeping posts matching all tokens
+    flags = {
+        f"match_{i}": Max(Case(When(token_filter, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for i, token_filter in enumerate(token_filters)
+    }
+    ranked = (
+        SearchTerm.objects.filter(any_token)
+        .values("post_id")
+        .annotate(rank=Sum("weight"), **flags)
+        .filter(**{name: 1 for name in flags})
+        .order_by("-rank")
+        .values_list("post_id", "rank")[:MAX_RESULTS]
+    )
+    ranks = dict(ranked)
+    if not ranks:
+        return queryset.none()
+
+    return queryset.filter(id__in=ranks).annotate(
+        search_rank=Case(
+            *[When(id=post_id, then=Value(rank)) for post_id, rank in ranks.items()],
+            output_field=IntegerField(),
+        )
+    ).order_by("-search_rank", "-created_at")
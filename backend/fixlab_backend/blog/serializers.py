@@ -1,10 +1,79 @@
+from html import unescape
+
 from rest_framework import serializers
 from django.conf import settings
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+from .images import image_variants, srcset
 from .models import BlogPost, Category, Tag, Comment, NewsletterSubscriber
 
 # Optional fallback placeholder for missing images
 PLACEHOLDER_IMAGE = getattr(settings, "PLACEHOLDER_IMAGE", "https://via.placeholder.com/400x300.png?text=No+Image")
 
+# Public comments embedded in a post's detail payload
+EMBEDDED_COMMENTS = getattr(settings, "BLOG_EMBEDDED_COMMENTS", 5)
+
+# Words kept when an excerpt has to be derived from the post body
+EXCERPT_WORDS = 40
+
+
+def derive_excerpt(html):
+    """ Plain-text excerpt from the start of a post's rich-text content """
+    html = html or ""
+    # The content may have been cut mid-tag; drop the unterminated tag
+    if html.rfind("<") > html.rfind(">"):
+        html = html[:html.rfind("<")]
+    return Truncator(unescape(strip_tags(html))).words(EXCERPT_WORDS, truncate="…")
+
+
+class SparseFieldsetMixin:
+    """
+    Honour `?fields=a,b,c` by dropping every other field from the output.
+    Unknown names are ignored; without the param all fields are returned.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        requested = request.query_params.get("fields") if request else None
+        if not requested:
+            return fields
+        wanted = {name.strip() for name in requested.split(",")}
+        return {name: field for name, field in fields.items() if name in wanted} or fields
+
+
+def responsive_images(image, request=None):
+    """ Absolute URLs of every variant of an ImageField plus a srcset, or None without an image """
+    if not image:
+        return None
+    try:
+        variants = image_variants(image)
+    except Exception:
+        # A misconfigured storage must not take the blog down with it
+        return None
+    urls = {name: request.build_absolute_uri(url) if request else url for name, url in variants.items()}
+    urls["srcset"] = srcset(urls)
+    return urls
+
+
+class ResponsiveImageMixin:
+    """
+    `image` is the `image_variant` size (the field keeps its old meaning of
+    "the URL to show"); `images` has every variant plus a ready srcset.
+    Serializers using it declare both as SerializerMethodFields.
+    """
+    image_variant = "card"
+
+    def get_images(self, obj):
+        # Memoized per instance: get_image and get_images share one lookup
+        if not hasattr(obj, "_responsive_images"):
+            obj._responsive_images = responsive_images(obj.image, self.context.get("request"))
+        return obj._responsive_images
+
+    def get_image(self, obj):
+        images = self.get_images(obj)
+        return images[self.image_variant] if images else PLACEHOLDER_IMAGE
+
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,6 +81,18 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "slug")
 
 
+class TagCountSerializer(TagSerializer):
+    """ Tag with the number of published posts using it (taxonomy endpoint only) """
+    post_count = serializers.SerializerMethodField()
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ("post_count",)
+
+    def get_post_count(self, obj):
+        count = getattr(obj, "post_count", None)
+        return obj.posts.filter(is_published=True).count() if count is None else count
+
+
 class CategorySerializer(serializers.ModelSerializer):
     blog_count = serializers.SerializerMethodField()
 
@@ -20,7 +101,9 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ("id", "name", "slug", "blog_count")
 
     def get_blog_count(self, obj):
-        return obj.posts.count()
+        # Views annotate blog_count; only count per row when they did not
+        count = getattr(obj, "blog_count", None)
+        return obj.posts.filter(is_published=True).count() if count is None else count
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -30,10 +113,16 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_at", "is_public")
 
 
-class BlogListSerializer(serializers.ModelSerializer):
+class BlogListSerializer(ResponsiveImageMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Slim list representation: no rich-text `content`. A blank `excerpt` is
+    derived from `content_head`, the opening characters of the content that
+    BlogListView annotates instead of loading the whole body.
+    """
     author = serializers.CharField()
     image = serializers.SerializerMethodField()
-    excerpt = serializers.CharField()
+    images = serializers.SerializerMethodField()
+    excerpt = serializers.SerializerMethodField()
     created_at = serializers.DateTimeField()
     category = CategorySerializer(read_only=True)
     comments_count = serializers.SerializerMethodField()
@@ -41,43 +130,53 @@ class BlogListSerializer(serializers.ModelSerializer):
     class Meta:
         model = BlogPost
         fields = (
-            "id", "title", "slug", "author", "excerpt", "content",
-            "image", "created_at", "category", "comments_count",
+            "id", "title", "slug", "author", "excerpt",
+            "image", "images", "created_at", "category", "comments_count",
         )
 
-    def get_image(self, obj):
-        request = self.context.get("request")
-        if obj.image:
-            url = obj.image.url
-            return request.build_absolute_uri(url) if request else url
-        return PLACEHOLDER_IMAGE
+    def get_excerpt(self, obj):
+        if obj.excerpt:
+            return obj.excerpt
+        head = getattr(obj, "content_head", None)
+        return derive_excerpt(obj.content if head is None else head)
 
     def get_comments_count(self, obj):
-        return obj.comments.filter(is_public=True).count()
+        # BlogListView annotates comments_count; only count per row when it did not
+        count = getattr(obj, "comments_count", None)
+        return obj.comments.filter(is_public=True).count() if count is None else count
 
 
-class BlogDetailSerializer(serializers.ModelSerializer):
+class BlogDetailSerializer(ResponsiveImageMixin, serializers.ModelSerializer):
+    """
+    Embeds only the first few public comments plus the total count; the rest
+    are loaded page by page from the post's comments endpoint.
+    """
     image = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
     tags = TagSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    comments_count = serializers.SerializerMethodField()
+    image_variant = "hero"
 
     class Meta:
         model = BlogPost
         fields = (
             "id", "title", "slug", "author", "excerpt", "content",
-            "image", "created_at", "updated_at", "category", "tags", "comments"
+            "image", "images", "created_at", "updated_at", "category", "tags",
+            "comments", "comments_count",
         )
 
-    def get_image(self, obj):
-        request = self.context.get("request")
-        if obj.image:
-            try:
-                url = obj.image.url  # Cloudinary URL
-                return request.build_absolute_uri(url) if request else url
-            except Exception:
-                return PLACEHOLDER_IMAGE
-        return PLACEHOLDER_IMAGE
+    def get_comments(self, obj):
+        # BlogDetailView prefetches the first page into `first_comments`
+        comments = getattr(obj, "first_comments", None)
+        if comments is None:
+            comments = obj.comments.filter(is_public=True)[:EMBEDDED_COMMENTS]
+        return CommentSerializer(comments, many=True).data
+
+    def get_comments_count(self, obj):
+        count = getattr(obj, "comments_count", None)
+        return obj.comments.filter(is_public=True).count() if count is None else count
 
 
 class NewsletterSubscriberSerializer(serializers.ModelSerializer):
@@ -1,53 +1,103 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
-from django.conf import settings
-from django.utils.timezone import now
-from .models import BlogPost, NewsletterSubscriber
-from .utils import send_email_via_sendgrid
-
-
-# Reuse styled email builder
-def build_email_html(title, greeting, message, footer):
-    greeting_html = f"<p>Hello <strong>{greeting}</strong>,</p>" if greeting else ""
-    html = f"""
-<div style="font-family:Arial, sans-serif; background-color:#f4f6f8; padding:20px;">
-  <div style="max-width:600px; margin:auto; background-color:#ffffff; border-radius:8px; overflow:hidden; border:1px solid #ddd;">
-    <div style="background-color:#0b5394; color:#fff; padding:15px; text-align:center; font-size:20px;">Fixlab Academy</div>
-    <div style="padding:20px; color:#333;">
-      <h2 style="color:#0b5394;">{title}</h2>
-      {greeting_html}
-      <p>{message}</p>
-      <p>{footer}</p>
-    </div>
-    <div style="background-color:#0b5394; color:#fff; text-align:center; padding:10px; font-size:12px;">
-      &copy; {now().year} Fixlab Team. All rights reserved.
-    </div>
-  </div>
-</div>
-"""
-    return html
+from .cache import bump_content_version, invalidate_post_details
+from .models import BlogPost, Category, Comment, NewsletterDispatch, Tag
+from .search import index_post
 
 
 @receiver(post_save, sender=BlogPost)
 def send_blog_notification(sender, instance, created, **kwargs):
     if created:
-        # Get all active subscribers
-        subscribers = NewsletterSubscriber.objects.filter(is_active=True)
-
-        for subscriber in subscribers:
-            subject = f"📢 New Blog Post: {instance.title}"
-
-            # Styled email content
-            html_message = build_email_html(
-                title=f"New Blog Published: {instance.title}",
-                greeting=subscriber.email,
-                message=f"We’ve just published a new blog post on our platform! 🎉<br><br>"
-                        f"<strong>{instance.title}</strong><br><br>"
-                        f"<a href='https://www.fixlabtech.com/blog_details?id={instance.id}' "
-                        f"style='display:inline-block; padding:10px 20px; background:#0b5394; color:#fff; border-radius:5px; text-decoration:none;'>"
-                        f"Read Full Article</a>",
-                footer=f"If you no longer wish to receive these updates, you can unsubscribe anytime:<br>"
-                       f"<a href='https://www.services.fixlabtech.com/api/blog/unsubscribe/{subscriber.email}/'>Unsubscribe</a>"
-            )
-
-            send_email_via_sendgrid(subject, html_message, subscriber.email)
+        # Queue the newsletter; the send_newsletters worker does the fan-out
+        # so saving a post never waits on SendGrid.
+        NewsletterDispatch.objects.create(post=instance)
+
+
+@receiver(post_save, sender=BlogPost)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_post(instance)
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def invalidate_blog_cache(sender, **kwargs):
+    # Orphans every cached blog response at once
+    bump_content_version()
+
+
+# ---------------- DETAIL DOCUMENT INVALIDATION ----------------
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def invalidate_post_detail(sender, instance, **kwargs):
+    post_ids = {instance.id}
+    if instance.category_id:
+        # Siblings embed the category's blog_count
+        post_ids.update(BlogPost.objects.filter(category_id=instance.category_id).values_list("id", flat=True))
+    invalidate_post_details(post_ids)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_post_detail(sender, instance, **kwargs):
+    invalidate_post_details([instance.post_id])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_taxonomy_post_details(sender, instance, **kwargs):
+    invalidate_post_details(instance.posts.values_list("id", flat=True))
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def invalidate_tagged_post_details(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        invalidate_post_details([instance.id])
+    elif action == "pre_clear":
+        invalidate_post_details(instance.posts.values_list("id", flat=True))
+    else:
+        invalidate_post_details(pk_set or [])
+
+
+# ---------------- RELATED POSTS ----------------
+# Flag posts whose related list may change; rebuild_related_posts picks them up
+
+@receiver(pre_save, sender=BlogPost)
+def flag_post_related(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.related_dirty = True
+
+
+@receiver(pre_delete, sender=BlogPost)
+def flag_posts_relating_to_deleted(sender, instance, **kwargs):
+    BlogPost.objects.filter(related_posts__related=instance).update(related_dirty=True)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Category)
+def flag_taxonomy_posts_related(sender, instance, **kwargs):
+    instance.posts.update(related_dirty=True)
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def flag_tagged_posts_related(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        BlogPost.objects.filter(id=instance.id).update(related_dirty=True)
+    elif action == "pre_clear":
+        instance.posts.update(related_dirty=True)
+    else:
+        BlogPost.objects.filter(id__in=pk_set or []).update(related_dirty=True)
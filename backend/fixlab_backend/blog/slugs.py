@@ -0,0 +1,64 @@
+"""
+Collision-free slug allocation for posts, categories and tags.
+
+The free slug is found with one query over the slug's unique index (the
+base slug plus every "base-N" already taken), and the save runs in its own
+savepoint: if a concurrent save grabbed the same slug first, the unique
+index rejects ours and we allocate again instead of failing the request.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+
+MAX_ATTEMPTS = 5
+# Room kept for the "-N" suffix when the base slug is truncated
+SUFFIX_ROOM = 8
+
+
+def next_free_slug(model, base):
+    """ `base`, or `base-N` with the smallest N >= 2 not taken yet """
+    taken = set(
+        model._default_manager.filter(Q(slug=base) | Q(slug__startswith=f"{base}-")).values_list("slug", flat=True)
+    )
+    if base not in taken:
+        return base
+    suffix = re.compile(rf"^{re.escape(base)}-(\d+)$")
+    used = {int(m.group(1)) for m in map(suffix.match, taken) if m}
+    n = 2
+    while n in used:
+        n += 1
+    return f"{base}-{n}"
+
+
+def base_slug(instance, source):
+    max_length = instance._meta.get_field("slug").max_length
+    base = slugify(source)[:max_length - SUFFIX_ROOM].strip("-") or instance._meta.model_name
+    # All-digit slugs would be shadowed by the numeric id routes
+    if base.isdigit():
+        base = f"{instance._meta.model_name}-{base}"
+    return base
+
+
+def save_with_unique_slug(instance, source, save, *args, **kwargs):
+    """
+    Run `save(*args, **kwargs)` (the model's super().save) after giving
+    `instance` a unique slug derived from `source`, unless it already has one.
+    """
+    if instance.slug:
+        return save(*args, **kwargs)
+
+    model = type(instance)
+    base = base_slug(instance, source)
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = next_free_slug(model, base)
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            # Only retry if it was our slug that clashed, not e.g. a duplicate name
+            if attempt == MAX_ATTEMPTS - 1 or not model._default_manager.filter(slug=instance.slug).exists():
+                instance.slug = ""
+                raise
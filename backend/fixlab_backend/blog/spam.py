@@ -0,0 +1,50 @@
+"""
+Cheap spam pre-filter for comments, run before anything touches the database.
+
+Only catches the obvious cases (link stuffing, blocked phrases, shouting,
+repeated submissions); anything it lets through is still subject to
+moderation in the admin.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+MAX_LINKS = getattr(settings, "BLOG_COMMENT_MAX_LINKS", 2)
+MAX_LENGTH = getattr(settings, "BLOG_COMMENT_MAX_LENGTH", 5000)
+# The same text from the same email inside this window is treated as a repeat
+DUPLICATE_WINDOW = getattr(settings, "BLOG_COMMENT_DUPLICATE_WINDOW", 10 * 60)
+BLOCKED_PHRASES = tuple(
+    phrase.lower() for phrase in getattr(settings, "BLOG_COMMENT_BLOCKED_PHRASES", (
+        "casino", "viagra", "crypto giveaway", "loan offer", "work from home and earn",
+    ))
+)
+
+LINK_RE = re.compile(r"https?://|www\.|\[url", re.IGNORECASE)
+REPEATED_CHAR_RE = re.compile(r"(.)\1{14,}")
+
+
+def spam_reason(name, email, content):
+    """ Why a comment looks like spam, or None when it passes """
+    content = content or ""
+    text = f"{name or ''} {content}".lower()
+
+    if len(content) > MAX_LENGTH:
+        return "too long"
+    if len(LINK_RE.findall(text)) > MAX_LINKS:
+        return "too many links"
+    if any(phrase in text for phrase in BLOCKED_PHRASES):
+        return "blocked phrase"
+    if REPEATED_CHAR_RE.search(content):
+        return "repeated characters"
+    letters = [c for c in content if c.isalpha()]
+    if len(letters) >= 20 and sum(c.isupper() for c in letters) / len(letters) > 0.8:
+        return "shouting"
+
+    fingerprint = hashlib.md5(f"{(email or '').lower()}|{' '.join(content.lower().split())}".encode()).hexdigest()
+    # cache.add is atomic: only the first of several identical submissions gets in
+    if not cache.add(f"comment:seen:{fingerprint}", 1, DUPLICATE_WINDOW):
+        return "duplicate"
+    return None
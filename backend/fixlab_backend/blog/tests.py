@@ -1,3 +1,290 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import BlogPost, Category, Comment, Tag
+from .search import search_posts
+from .throttling import COMMENT_BURST, SlidingWindowLimit
+
+
+class QueryCountTests(TestCase):
+    """ Each endpoint must run a fixed number of queries, however many rows it returns """
+
+    def setUp(self):
+        cache.clear()
+
+    def create_posts(self, count):
+        for _ in range(count):
+            n = BlogPost.objects.count()
+            category = Category.objects.create(name=f"Category {n}")
+            tag = Tag.objects.create(name=f"Tag {n}")
+            post = BlogPost.objects.create(title=f"Post {n}", content="<p>Body</p>", category=category)
+            post.tags.add(tag)
+            Comment.objects.create(post=post, name="Reader", email="reader@example.com", content="Nice")
+            Comment.objects.create(post=post, name="Hidden", email="hidden@example.com", content="Spam", is_public=False)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def assert_constant_queries(self, url, expected):
+        self.create_posts(2)
+        small, _ = self.count_queries(url)
+        self.create_posts(10)
+        large, response = self.count_queries(url)
+        self.assertEqual(small, large)
+        self.assertEqual(large, expected)
+        return response
+
+    def test_blog_list(self):
+        # page count, posts with comment counts, categories with blog counts
+        response = self.assert_constant_queries(reverse("api-blogs") + "?page_size=50", 3)
+        first = response.json()["data"]["results"][0]
+        self.assertEqual(first["comments_count"], 1)
+        self.assertEqual(first["category"]["blog_count"], 1)
+
+    def test_category_list(self):
+        response = self.assert_constant_queries(reverse("api-categories"), 1)
+        self.assertEqual(response.json()["data"][0]["blog_count"], 1)
+
+    def test_tag_list(self):
+        # Unpaginated: every tag with its usage count in one query
+        response = self.assert_constant_queries(reverse("api-tags"), 1)
+        self.assertEqual(len(response.json()["data"]), 12)
+        self.assertEqual(response.json()["data"][0]["post_count"], 1)
+
+    def test_taxonomy_counts_only_published_posts(self):
+        self.create_posts(1)
+        BlogPost.objects.update(is_published=False)
+        cache.clear()
+        self.assertEqual(self.client.get(reverse("api-categories")).json()["data"][0]["blog_count"], 0)
+        self.assertEqual(self.client.get(reverse("api-tags")).json()["data"][0]["post_count"], 0)
+
+    def test_cached_taxonomy_runs_no_queries_until_content_changes(self):
+        self.create_posts(2)
+        url = reverse("api-tags")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Tag.objects.create(name="Fresh")
+        self.assertEqual(len(self.client.get(url).json()["data"]), 3)
+
+    def test_blog_detail(self):
+        self.create_posts(1)
+        post = BlogPost.objects.get()
+        queries, response = self.count_queries(reverse("api-blog-detail", args=[post.id]))
+        # post, tags, comments, category with blog count
+        self.assertEqual(queries, 4)
+        self.assertEqual(response.json()["data"]["category"]["blog_count"], 1)
+
+    def test_blog_detail_by_slug(self):
+        self.create_posts(1)
+        post = BlogPost.objects.get()
+        queries, response = self.count_queries(reverse("api-blog-detail-slug", args=[post.slug]))
+        # slug -> id through the unique index, then the same queries as by id
+        self.assertEqual(queries, 5)
+        self.assertEqual(response.json()["data"]["id"], post.id)
+
+    def test_cached_blog_list_runs_no_queries(self):
+        self.create_posts(3)
+        url = reverse("api-blogs")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(7):
+            BlogPost.objects.create(title=f"Post {i % 2}", content="<p>Body</p>")
+        # Every post shares one created_at, so only the id tie-break orders them
+        BlogPost.objects.update(created_at=datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+
+    def walk(self, params):
+        """ ids of every page followed through `next`, and the number of requests """
+        ids, url, pages = [], reverse("api-blogs"), 0
+        params = {"pagination": "cursor", "page_size": 3, **params}
+        while url:
+            response = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()["data"]
+            ids += [post["id"] for post in data["results"]]
+            url, pages = data["next"], pages + 1
+        return ids, pages
+
+    def test_next_cursor_across_ties(self):
+        ids, pages = self.walk({})
+        self.assertEqual(ids, sorted(BlogPost.objects.values_list("id", flat=True), reverse=True))
+        self.assertEqual(pages, 3)
+
+    def test_next_cursor_across_title_ties(self):
+        ids, _ = self.walk({"ordering": "title"})
+        expected = list(BlogPost.objects.order_by("title", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_tampered_cursor_is_not_found(self):
+        garbage = base64.urlsafe_b64encode(b'["not a date", 1]').decode()
+        for cursor in ("%%%", "bm90IGpzb24=", garbage):
+            response = self.client.get(reverse("api-blogs"), {"pagination": "cursor", "cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("api-blogs"), {"pagination": "cursor"})
+        self.assertFalse([q["sql"] for q in queries if '"__count"' in q["sql"]])
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("api-blogs"))
+        # Page-number pagination does count, so the check above can fail
+        self.assertTrue([q["sql"] for q in queries if '"__count"' in q["sql"]])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.post = BlogPost.objects.create(title="Cached", content="<p>Body</p>")
+        self.urls = [reverse("api-blogs"), reverse("api-blog-detail", args=[self.post.id])]
+
+    def test_if_none_match(self):
+        for url in self.urls:
+            etag = self.client.get(url)["ETag"]
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response["ETag"], etag)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_if_modified_since(self):
+        for url in self.urls:
+            last_modified = self.client.get(url)["Last-Modified"]
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304, url)
+            earlier = "Mon, 01 Jan 2024 00:00:00 GMT"
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200, url)
+
+    def assert_etags_change(self, change):
+        before = [self.client.get(url)["ETag"] for url in self.urls]
+        change()
+        for url, etag in zip(self.urls, before):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_new_comment_changes_etag(self):
+        self.assert_etags_change(lambda: Comment.objects.create(
+            post=self.post, name="Reader", email="reader@example.com", content="Nice"
+        ))
+
+    def test_post_edit_changes_etag(self):
+        def edit():
+            self.post.title = "Edited"
+            self.post.save()
+
+        self.assert_etags_change(edit)
+        self.assertEqual(self.client.get(self.urls[1]).json()["data"]["title"], "Edited")
+
+
+class SlugTests(TestCase):
+    def test_colliding_titles_get_numbered_slugs(self):
+        slugs = [BlogPost.objects.create(title="Same Title", content="x").slug for _ in range(3)]
+        self.assertEqual(slugs, ["same-title", "same-title-2", "same-title-3"])
+
+    def test_freed_number_is_reused(self):
+        BlogPost.objects.create(title="Go", content="x")
+        second = BlogPost.objects.create(title="Go", content="x")
+        BlogPost.objects.create(title="Go", content="x")
+        second.delete()
+        self.assertEqual(BlogPost.objects.create(title="Go", content="x").slug, "go-2")
+
+    def test_numeric_title_does_not_shadow_id_route(self):
+        self.assertEqual(Category.objects.create(name="2025").slug, "category-2025")
+
+
+class PostCommentsTests(TestCase):
+    def setUp(self):
+        self.post = BlogPost.objects.create(title="Comments", content="<p>Body</p>")
+        Comment.objects.create(post=self.post, name="Reader", email="reader@example.com", content="Nice")
+        self.url = reverse("api-blog-comments", args=[self.post.id])
+
+    def test_since_filters_comments(self):
+        response = self.client.get(self.url, {"since": "2000-01-01T00:00:00"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]["results"]), 1)
+
+    def test_invalid_since_is_rejected(self):
+        for since in ("yesterday", "2024-13-45T00:00:00"):
+            response = self.client.get(self.url, {"since": since})
+            self.assertEqual(response.status_code, 400, since)
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_requests_cannot_exceed_capacity(self):
+        limit = SlidingWindowLimit("test", 3, 1 / 60)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda _: limit.consume("flood"), range(100)))
+        self.assertEqual(sum(1 for allowed, _ in results if allowed), 3)
+        self.assertTrue(all(wait > 0 for allowed, wait in results if not allowed))
+
+
+class CommentThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.post = BlogPost.objects.create(title="Throttled", content="<p>Body</p>")
+        self.url = reverse("api-blog-comments", args=[self.post.id])
+
+    def test_spoofed_forwarded_for_does_not_reset_limit(self):
+        statuses = []
+        for i in range(COMMENT_BURST + 2):
+            response = self.client.post(
+                self.url,
+                {"name": "Bot", "email": f"bot{i}@example.com", "content": f"Comment number {i} here"},
+                HTTP_X_FORWARDED_FOR=f"10.0.0.{i}, 203.0.113.7",
+            )
+            statuses.append(response.status_code)
+        self.assertNotIn(429, statuses[:COMMENT_BURST])
+        self.assertEqual(statuses[COMMENT_BURST:], [429, 429])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        BlogPost.objects.create(title="Theme design basics", content="<p>Colours</p>")
+        BlogPost.objects.create(title="Python tips", content="<p>Short tips</p>")
+
+    def titles(self, query):
+        return sorted(post.title for post in search_posts(BlogPost.objects.all(), query))
+
+    def test_partial_last_word_matches_as_prefix(self):
+        self.assertEqual(self.titles("t"), ["Python tips", "Theme design basics"])
+        self.assertEqual(self.titles("the"), ["Theme design basics"])
+        self.assertEqual(self.titles("python t"), ["Python tips"])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.titles("tips theme"), [])
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            BlogPost.objects.create(title=f"Compressed post {i}", content="<p>Body</p>" * 20)
+
+    def test_json_prefers_brotli(self):
+        response = self.client.get(reverse("api-blogs"), HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
 
-# Create your tests here.
+    def test_html_stays_on_padded_gzip(self):
+        response = self.client.get("/admin/login/", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Type"].split(";")[0], "text/html")
+        self.assertEqual(response["Content-Encoding"], "gzip")
@@ -0,0 +1,104 @@
+"""
+Rate limiting for public write endpoints, kept in the shared cache.
+
+A client may make up to `capacity` requests per `capacity / rate` seconds,
+with a sliding window so that requests are not allowed in a burst at every
+window boundary. Counters are updated with atomic cache.add/incr, so a
+flood of concurrent requests cannot all read the same count and slip
+through together. They live in the Django cache (Redis in production),
+which makes the limit apply across all workers.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+# Comments per client: a burst of COMMENT_BURST, one every COMMENT_REFILL_SECONDS on average
+COMMENT_BURST = getattr(settings, "BLOG_COMMENT_BURST", 3)
+COMMENT_REFILL_SECONDS = getattr(settings, "BLOG_COMMENT_REFILL_SECONDS", 60)
+
+
+class SlidingWindowLimit:
+    """
+    Sliding-window counter: the current fixed window's count plus the
+    previous window's, weighted by how much of it still overlaps.
+    """
+
+    def __init__(self, scope, capacity, rate):
+        self.scope = scope
+        self.capacity = capacity
+        self.window = capacity / rate   # seconds
+
+    def _key(self, ident, slot):
+        return f"throttle:{self.scope}:{ident}:{slot}"
+
+    def _incr(self, key, tokens):
+        # Kept for two windows: the next one still weighs this count
+        timeout = int(2 * self.window) + 1
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key, tokens)
+        except ValueError:
+            # Expired between add and incr
+            cache.add(key, 0, timeout)
+            return cache.incr(key, tokens)
+
+    def consume(self, ident, tokens=1):
+        """
+        Count `tokens` requests for `ident`. Returns (allowed, wait) where
+        `wait` is roughly the seconds until a request would be allowed.
+        """
+        now = time.time()
+        slot, offset = divmod(now, self.window)
+        slot = int(slot)
+        key = self._key(ident, slot)
+
+        # incr is atomic, so concurrent callers each see a distinct count
+        count = self._incr(key, tokens)
+        previous = cache.get(self._key(ident, slot - 1), 0)
+        overlap = 1 - offset / self.window
+        used = previous * overlap + count
+        if used <= self.capacity:
+            return True, 0
+
+        try:
+            cache.decr(key, tokens)
+        except ValueError:
+            pass
+        remaining = self.window - offset
+        if previous:
+            # The previous window's weight drains at previous / window per second
+            return False, min(remaining, (used - self.capacity) * self.window / previous)
+        return False, remaining
+
+
+class CommentRateThrottle(BaseThrottle):
+    """
+    Throttles comment submissions per client IP and per commenter email;
+    both must be under their limit. Reads are never throttled.
+    """
+    limit = SlidingWindowLimit("comment", COMMENT_BURST, 1 / COMMENT_REFILL_SECONDS)
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        if request.method != "POST":
+            return True
+
+        idents = [f"ip:{self.get_ident(request)}"]
+        email = str(request.data.get("email") or "").strip().lower()
+        if email:
+            idents.append(f"email:{email}")
+
+        for ident in idents:
+            allowed, wait = self.limit.consume(ident)
+            if not allowed:
+                self.wait_seconds = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -6,7 +6,9 @@ from .views import NewsletterSubscribeView,NewsletterUnsubscribeView
 urlpatterns = [
     path("blogs/", views.BlogListView.as_view(), name="api-blogs"),
     path("blogs/<int:id>/", views.BlogDetailView.as_view(), name="api-blog-detail"),
+    path("blogs/<int:post_id>/related/", views.RelatedPostsView.as_view(), name="api-blog-related"),
     path("blogs/<int:post_id>/comments/", views.PostCommentsView.as_view(), name="api-blog-comments"),
+    path("blogs/<slug:slug>/", views.BlogDetailView.as_view(), name="api-blog-detail-slug"),
     path("categories/", views.CategoryListView.as_view(), name="api-categories"),
     path("tags/", views.TagListView.as_view(), name="api-tags"),
     path("newsletter/subscribe/", NewsletterSubscribeView.as_view(), name="newsletter-subscribe"),
@@ -1,21 +1,46 @@
-from django.db.models import Count, Q
+import logging
+
+from django.db.models import Case, Count, IntegerField, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404, render
-from django.utils.timezone import now
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from .utils import send_email_via_sendgrid
+from notifications.emails import render_email
+from notifications.outbox import enqueue_email
 from .models import BlogPost, Category, Tag, Comment, NewsletterSubscriber
 from .serializers import (
+    EMBEDDED_COMMENTS,
     BlogListSerializer,
     BlogDetailSerializer,
     CategorySerializer,
-    TagSerializer,
+    TagCountSerializer,
     CommentSerializer,
 )
-from .pagination import StandardResultsSetPagination
+from .pagination import CommentKeysetPagination, KeysetPagination, StandardResultsSetPagination
+from .cache import (
+    DETAIL_CACHE_TIMEOUT,
+    LIST_CACHE_TIMEOUT,
+    TAXONOMY_CACHE_TIMEOUT,
+    blog_detail_cache_key,
+    blog_list_cache_key,
+    related_cache_key,
+    taxonomy_cache_key,
+)
+from .newsletter import unsubscribe_url
+from .search import search_posts
+from .conditional import ConditionalGetMixin
+from .comment_buffer import comment_buffer
+from .spam import spam_reason
+from .throttling import CommentRateThrottle
+
+
+logger = logging.getLogger(__name__)
 
 
 # Helper for standardized API responses
@@ -26,47 +51,106 @@ def api_response(status_text, message, data=None, http_status=status.HTTP_200_OK
     )
 
 
-# Helper to build styled HTML email (same design across all emails)
-def build_email_html(title, greeting, message, footer):
-    greeting_html = f"<p>Hello <strong>{greeting}</strong>,</p>" if greeting else ""
-    html = f"""
-<div style="font-family:Arial, sans-serif; background-color:#f4f6f8; padding:20px;">
-  <div style="max-width:600px; margin:auto; background-color:#ffffff; border-radius:8px; overflow:hidden; border:1px solid #ddd;">
-    <div style="background-color:#0b5394; color:#fff; padding:15px; text-align:center; font-size:20px;">Fixlab Academy</div>
-    <div style="padding:20px; color:#333;">
-      <h2 style="color:#0b5394;">{title}</h2>
-      {greeting_html}
-      <p>{message}</p>
-      <p>{footer}</p>
-    </div>
-    <div style="background-color:#0b5394; color:#fff; text-align:center; padding:10px; font-size:12px;">
-      &copy; {now().year} Fixlab Team. All rights reserved.
-    </div>
-  </div>
-</div>
-"""
-    return html
+# ---------------- BLOG VIEWS ----------------
 
+# Characters of content read to derive a missing excerpt (markup included)
+EXCERPT_SOURCE_CHARS = 1500
+
+# Orderings clients may request; each is served by an index on BlogPost
+# (see BlogPost.Meta.indexes). Anything else falls back to the default.
+BLOG_ORDERINGS = ("-created_at", "created_at", "title", "-title")
+
+def categories_with_counts():
+    """ Category queryset carrying its published-post blog_count, computed in the same query """
+    return Category.objects.annotate(blog_count=Count("posts", filter=Q(posts__is_published=True)))
+
+
+def tags_with_counts():
+    """ Tag queryset carrying post_count, the number of published posts using each tag """
+    return Tag.objects.annotate(post_count=Count("posts", filter=Q(posts__is_published=True)))
+
+
+def taxonomy_snapshot(name, build):
+    """
+    Serialized category / tag listing, cached until any blog content changes.
+    `build` runs only on a miss.
+    """
+    cache_key = taxonomy_cache_key(name)
+    data = cache.get(cache_key)
+    if data is None:
+        data = build()
+        cache.set(cache_key, data, TAXONOMY_CACHE_TIMEOUT)
+    return data
+
+
+def public_comments_count():
+    """
+    Per-post public comment count as a correlated subquery. Unlike a JOIN +
+    GROUP BY it leaves the outer query free to walk an index and stop at
+    LIMIT, so only the rows on the page are counted.
+    """
+    counts = (
+        Comment.objects.filter(post=OuterRef("pk"), is_public=True)
+        .order_by()
+        .values("post")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def published_list_queryset():
+    """ Published posts shaped for BlogListSerializer """
+    # The list never ships the rich-text body; only the opening characters
+    # are fetched, and only for posts that need a derived excerpt.
+    return (
+        BlogPost.objects.filter(is_published=True)
+        .defer("content")
+        .annotate(
+            comments_count=public_comments_count(),
+            content_head=Case(
+                When(excerpt="", then=Substr("content", 1, EXCERPT_SOURCE_CHARS)),
+                default=Value(""),
+            ),
+        )
+        .prefetch_related(Prefetch("category", queryset=categories_with_counts()))
+    )
 
-# ---------------- BLOG VIEWS ----------------
 
-class BlogListView(generics.ListAPIView):
+class BlogListView(ConditionalGetMixin, generics.ListAPIView):
+    """
+    Published posts, page-number paginated by default.
+    `?pagination=cursor` switches to keyset pagination for infinite scroll.
+    """
     serializer_class = BlogListSerializer
     pagination_class = StandardResultsSetPagination
 
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("pagination") == "cursor":
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_ordering(self):
+        """ The requested ordering if it is whitelisted, else None """
+        ordering = self.request.query_params.get("ordering")
+        return ordering if ordering in BLOG_ORDERINGS else None
+
+    def get_keyset_ordering(self):
+        return self.get_ordering()
+
     def get_queryset(self):
-        qs = BlogPost.objects.filter(is_published=True).select_related("category").prefetch_related("tags")
+        qs = published_list_queryset()
         search = self.request.query_params.get("search")
         category = self.request.query_params.get("category")
-        ordering = self.request.query_params.get("ordering")
+        ordering = self.get_ordering()
 
         if search:
-            qs = qs.filter(
-                Q(title__icontains=search)
-                | Q(content__icontains=search)
-                | Q(excerpt__icontains=search)
-                | Q(author__icontains=search)
-            )
+            # Ranked by relevance unless an explicit ordering is given below
+            qs = search_posts(qs, search)
 
         if category:
             try:
@@ -75,17 +159,36 @@ class BlogListView(generics.ListAPIView):
                 pass
 
         if ordering:
-            qs = qs.order_by(ordering)
+            # Tie-break on id in the same direction so the index order is used as-is
+            qs = qs.order_by(ordering, "-id" if ordering.startswith("-") else "id")
 
         return qs
 
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        return api_response("success", "Blogs retrieved successfully", response.data)
-
-
-class BlogDetailView(generics.RetrieveAPIView):
-    queryset = BlogPost.objects.filter(is_published=True).prefetch_related("tags", "comments", "category")
+        # Served from cache until any blog content changes (see blog/cache.py)
+        cache_key = blog_list_cache_key(request)
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, LIST_CACHE_TIMEOUT)
+        return api_response("success", "Blogs retrieved successfully", data)
+
+
+class BlogDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """ One published post, addressed by id or by slug """
+    queryset = (
+        BlogPost.objects.filter(is_published=True)
+        .annotate(comments_count=public_comments_count())
+        .prefetch_related(
+            "tags",
+            Prefetch(
+                "comments",
+                queryset=Comment.objects.filter(is_public=True)[:EMBEDDED_COMMENTS],
+                to_attr="first_comments",
+            ),
+            Prefetch("category", queryset=categories_with_counts()),
+        )
+    )
     serializer_class = BlogDetailSerializer
     lookup_field = "id"
 
@@ -95,41 +198,106 @@ class BlogDetailView(generics.RetrieveAPIView):
         return context
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return api_response("success", "Blog retrieved successfully", serializer.data)
+        if "slug" in kwargs:
+            # Slug routes resolve to the id with one read of the unique slug
+            # index; the document itself is cached by id either way
+            self.kwargs["id"] = get_object_or_404(
+                BlogPost.objects.filter(is_published=True, slug=kwargs["slug"]).values_list("id", flat=True)
+            )
+
+        # Pre-rendered document, rebuilt after the post, its comments or tags change
+        cache_key = blog_detail_cache_key(request, self.kwargs[self.lookup_field])
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.get_serializer(self.get_object()).data
+            cache.set(cache_key, data, DETAIL_CACHE_TIMEOUT)
+        return api_response("success", "Blog retrieved successfully", data)
+
+
+class RelatedPostsView(ConditionalGetMixin, APIView):
+    """ Precomputed related posts of a post, best first (see blog/related.py) """
+
+    def get(self, request, post_id):
+        cache_key = related_cache_key(request, post_id)
+        data = cache.get(cache_key)
+        if data is None:
+            posts = published_list_queryset().filter(related_from__post_id=post_id).order_by("related_from__rank")
+            data = BlogListSerializer(posts, many=True, context={"request": request}).data
+            cache.set(cache_key, data, LIST_CACHE_TIMEOUT)
+        return api_response("success", "Related blogs retrieved successfully", data)
 
 
-class CategoryListView(APIView):
+class CategoryListView(ConditionalGetMixin, APIView):
     def get(self, request):
-        cats = Category.objects.annotate(blog_count=Count("posts")).order_by("name")
-        serializer = CategorySerializer(cats, many=True)
-        return api_response("success", "Categories retrieved successfully", serializer.data)
+        data = taxonomy_snapshot(
+            "categories",
+            lambda: CategorySerializer(categories_with_counts().order_by("name"), many=True).data,
+        )
+        return api_response("success", "Categories retrieved successfully", data)
 
 
-class TagListView(generics.ListAPIView):
-    queryset = Tag.objects.all()
-    serializer_class = TagSerializer
+class TagListView(ConditionalGetMixin, APIView):
+    """ Every tag, unpaginated: the sidebar shows them all """
 
-    def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        return api_response("success", "Tags retrieved successfully", response.data)
+    def get(self, request):
+        data = taxonomy_snapshot(
+            "tags",
+            lambda: TagCountSerializer(tags_with_counts().order_by("name"), many=True).data,
+        )
+        return api_response("success", "Tags retrieved successfully", data)
 
 
 class PostCommentsView(APIView):
+    """
+    GET pages through public comments oldest first (`cursor`, `page_size`).
+    `since=<ISO datetime>` returns only comments newer than that, for polling.
+
+    POST is throttled per IP and per email and spam-checked before any write;
+    with BLOG_COMMENT_BUFFERED on, comments are batched and answered with 202.
+    """
+    throttle_classes = [CommentRateThrottle]
+
     def get(self, request, post_id):
         comments = Comment.objects.filter(post_id=post_id, is_public=True)
-        serializer = CommentSerializer(comments, many=True)
-        return api_response("success", "Comments retrieved successfully", serializer.data)
+
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since_dt = parse_datetime(since)
+            except ValueError:
+                # Well formed but impossible, e.g. month 13
+                since_dt = None
+            if since_dt is None:
+                return api_response("error", "Invalid 'since' datetime.", http_status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since_dt):
+                since_dt = timezone.make_aware(since_dt)
+            comments = comments.filter(created_at__gt=since_dt)
+
+        paginator = CommentKeysetPagination()
+        page = paginator.paginate_queryset(comments, request, view=self)
+        serializer = CommentSerializer(page, many=True)
+        data = paginator.get_paginated_response(serializer.data).data
+        return api_response("success", "Comments retrieved successfully", data)
 
     def post(self, request, post_id):
         data = request.data.copy()
         data["post"] = post_id
         serializer = CommentSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save()
-            return api_response("success", "Comment added successfully", serializer.data, status.HTTP_201_CREATED)
-        return api_response("error", "Invalid data", serializer.errors, status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return api_response("error", "Invalid data", serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        fields = serializer.validated_data
+        reason = spam_reason(fields["name"], fields["email"], fields["content"])
+        if reason:
+            logger.info("Rejected comment on post %s from %s: %s", post_id, fields["email"], reason)
+            return api_response("error", "Your comment could not be posted.", http_status=status.HTTP_400_BAD_REQUEST)
+
+        if getattr(settings, "BLOG_COMMENT_BUFFERED", False):
+            comment_buffer.add(**fields)
+            return api_response("success", "Comment received", http_status=status.HTTP_202_ACCEPTED)
+
+        serializer.save()
+        return api_response("success", "Comment added successfully", serializer.data, status.HTTP_201_CREATED)
 
 
 # ---------------- NEWSLETTER VIEWS ----------------
@@ -148,15 +316,15 @@ class NewsletterSubscribeView(APIView):
         subscriber.is_active = True
         subscriber.save()
 
-        subject = "Welcome to The Fixlab Newsletter!"
-        html_message = build_email_html(
+        email = render_email(
+            subject="Welcome to The Fixlab Newsletter!",
             title="Welcome to Fixlab Newsletter",
             greeting=subscriber.email,
             message="Thank you for subscribing 🎊. You’ll now receive updates whenever we publish new blogs and announcements.",
             footer=f"If you wish to unsubscribe anytime, click here:<br>"
-                   f"<a href='https://www.services.fixlabtech.com/api/blog/unsubscribe/{subscriber.email}/'>Unsubscribe</a>"
+                   f"<a href='{unsubscribe_url(subscriber.email)}'>Unsubscribe</a>"
         )
-        send_email_via_sendgrid(subject, html_message, subscriber.email)
+        enqueue_email(email.subject, email.html, subscriber.email, email.text)
 
         return api_response(
             "subscribed" if created else "resubscribed",
@@ -175,15 +343,15 @@ class NewsletterUnsubscribeView(APIView):
                 subscriber.is_active = False
                 subscriber.save()
 
-                subject = "You Have Unsubscribed"
-                html_message = build_email_html(
+                email = render_email(
+                    subject="You Have Unsubscribed",
                     title="You Have Unsubscribed",
                     greeting=subscriber.email,
                     message="You have successfully unsubscribed from our newsletter. We’re sorry to see you go 💔.",
-                    footer=f"If you ever change your mind, resubscribe here:<br>"
-                           f"<a href='https://www.fixlabtech.com/blog/'>Resubscribe</a>"
+                    footer="If you ever change your mind, resubscribe here:<br>"
+                           "<a href='https://www.fixlabtech.com/blog/'>Resubscribe</a>"
                 )
-                send_email_via_sendgrid(subject, html_message, subscriber.email)
+                enqueue_email(email.subject, email.html, subscriber.email, email.text)
 
                 message = "You have unsubscribed successfully. A confirmation email has been sent."
 
@@ -0,0 +1,44 @@
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that prefers Brotli for JSON API responses when the client
+    accepts it and the `brotli` package is installed. Everything else (HTML
+    pages carrying CSRF tokens in particular, streaming responses, tiny
+    bodies) is left to the gzip path, which pads its output against BREACH.
+    """
+    def process_response(self, request, response):
+        if (
+            brotli is None
+            or response.streaming
+            or not response.get("Content-Type", "").startswith("application/json")
+            or len(response.content) < 200
+            or response.has_header("Content-Encoding")
+            or not re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=5)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(response.content))
+        # A strong ETag would claim byte-equality with the uncompressed body
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
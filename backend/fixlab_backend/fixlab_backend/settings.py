@@ -26,6 +26,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "fallback-secret-key")
 DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1")
 PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
+PAYSTACK_BASE_URL = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")
+PAYSTACK_CONNECT_TIMEOUT = float(os.getenv("PAYSTACK_CONNECT_TIMEOUT", 3.05))
+PAYSTACK_READ_TIMEOUT = float(os.getenv("PAYSTACK_READ_TIMEOUT", 10))
 
 
 # Allow Django to serve this host
@@ -61,6 +64,7 @@ INSTALLED_APPS = [
     'contact',
     'blog.apps.BlogConfig',
     'registrations',
+    'notifications',
      
 ]
 
@@ -77,6 +81,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'fixlab_backend.middleware.CompressionMiddleware',  # brotli for API JSON, gzip otherwise
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -142,6 +147,33 @@ DATABASES['default']['OPTIONS'] = {
 }
 
 
+# Cache used for API responses and cross-request state. Production must set
+# REDIS_URL (the redis package is in requirements.txt). Without it each
+# process has its own LocMemCache. Content-version bumps then never leave the
+# process that made them, so a change made by a management command is not
+# seen by the web workers. The affected commands include
+# rebuild_related_posts, generate_image_variants and reconcile_payments.
+# Cached pages and ETags stay stale until their timeouts expire, and the
+# registration idempotency lock only covers one process.
+# LocMemCache is only meant for local development.
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "fixlab",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -188,11 +220,34 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "apikey")
 EMAIL_HOST_PASSWORD = os.getenv("SENDGRID_API_KEY")
 DEFAULT_FROM_EMAIL = "noreply@fixlabtech.com"
 
+# Transport used by notifications.transport; FakeTransport keeps mail offline
+EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "notifications.transport.SendGridTransport")
+
+# Operational logs go to the console (collected by Render). registrations.paystack
+# logs a JSON line of Paystack latency and breaker state every PAYSTACK_METRICS_LOG_INTERVAL
+PAYSTACK_METRICS_LOG_INTERVAL = int(os.getenv("PAYSTACK_METRICS_LOG_INTERVAL", 5 * 60))
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "registrations": {"handlers": ["console"], "level": "INFO"},
+        "notifications": {"handlers": ["console"], "level": "INFO"},
+        "blog": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+SENDGRID_POOL_SIZE = int(os.getenv("SENDGRID_POOL_SIZE", 10))
+
 
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'blog.pagination.StandardResultsSetPagination',
-    'PAGE_SIZE': 5
+    'PAGE_SIZE': 5,
+    # Render's load balancer is the one proxy in front of the app; throttles key on the
+    # address it appends to X-Forwarded-For, not on anything the client put there
+    'NUM_PROXIES': int(os.getenv("NUM_PROXIES", 1)),
 }
 
 
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'claimed_at', 'claim_token', 'last_error')
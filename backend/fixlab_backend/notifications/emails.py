@@ -0,0 +1,117 @@
+"""
+Shared rendering of the Fixlab HTML emails, with a plain-text alternative.
+
+Every email is the same chrome (brand header, copyright footer) around a
+body of title, greeting, message, an optional table of rows and a footer.
+The chrome only changes with the year, so it is rendered once per process
+and year and cached as the text before and after the body. The body
+templates are compiled once. Only the body is rendered per email.
+
+For mail sent to many people, render once with tokens (e.g. "-full_name-")
+in place of the per-recipient fields. Then either fill them in with
+`personalize()`, which is plain string replacement, or hand SendGrid
+`substitutions()`. SendGrid applies every substitution to both parts, so
+pass the tokens to `render_email(tokens=...)`. The text part then carries
+its own text tokens, which get the unescaped values.
+
+`message` and `footer` are trusted HTML fragments. Everything else is
+escaped. The plain text is rendered from the same parts, with links
+written out.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+from html import unescape
+
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+
+
+BRAND = "Fixlab Academy"
+# Stands in for the body while the chrome is rendered, then split on
+CONTENT_MARKER = "-content-"
+
+RenderedEmail = namedtuple("RenderedEmail", "subject html text")
+
+LINK_RE = re.compile(r"""<a\s[^>]*?href=["']([^"']*)["'][^>]*>(.*?)</a>""", re.IGNORECASE | re.DOTALL)
+BREAK_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
+BLOCK_RE = re.compile(r"</?(?:p|div|h\d|table|tr|ul|ol|li)\b[^>]*>", re.IGNORECASE)
+SPACES_RE = re.compile(r"[ \t]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+@lru_cache(maxsize=None)
+def _template(name):
+    return get_template(f"notifications/email/{name}")
+
+
+@lru_cache(maxsize=4)
+def chrome(year, text=False):
+    """ (before, after) the body for the HTML or text layout of `year` """
+    layout = _template("layout.txt" if text else "layout.html")
+    rendered = layout.render({"brand": BRAND, "year": year, "content": CONTENT_MARKER})
+    before, after = rendered.split(CONTENT_MARKER)
+    return before, after
+
+
+def html_to_text(fragment):
+    """ Plain text of an HTML fragment: links as "text (url)", breaks and blocks as newlines """
+    def link(match):
+        url, label = match.group(1), strip_tags(match.group(2)).strip()
+        return f"{label} ({url})" if label and label != url else url
+
+    text = LINK_RE.sub(link, fragment)
+    text = BREAK_RE.sub("\n", text)
+    text = BLOCK_RE.sub("\n\n", text)
+    text = unescape(strip_tags(text))
+    lines = (SPACES_RE.sub(" ", line).strip() for line in text.splitlines())
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def text_token(token):
+    """ The stand-in for `token` in the plain-text part: "-name-" becomes "-text_name-" """
+    return f"-text_{token.strip('-')}-"
+
+
+def render_email(subject, title, message, greeting=None, rows=(), rows_title=None, footer="", tokens=()):
+    """
+    Render an email; returns RenderedEmail(subject, html, text).
+
+    `rows` is a sequence of (label, value) shown as a table under
+    `rows_title`. `tokens` named here are swapped for their text_token()
+    in the text part.
+    """
+    year = timezone.now().year
+    context = {"title": title, "greeting": greeting, "message": message,
+               "rows": rows, "rows_title": rows_title, "footer": footer}
+    html_before, html_after = chrome(year)
+    html = html_before + _template("body.html").render(context) + html_after
+
+    context.update(message=html_to_text(message), footer=html_to_text(footer))
+    text_before, text_after = chrome(year, text=True)
+    text = text_before + _template("body.txt").render(context).strip() + text_after
+    for token in tokens:
+        text = text.replace(token, text_token(token))
+    return RenderedEmail(subject, html, text)
+
+
+def substitutions(values):
+    """ SendGrid substitutions for {token: value}: escaped for the HTML part, raw for the text part """
+    result = {}
+    for token, value in values.items():
+        value = str(value)
+        result[token] = escape(value)
+        result[text_token(token)] = value
+    return result
+
+
+def personalize(email, values):
+    """ Replace per-recipient tokens in a rendered email; values are escaped in the HTML """
+    subject, html, text = email
+    for token, value in values.items():
+        value = str(value)
+        subject = subject.replace(token, value)
+        html = html.replace(token, escape(value))
+        text = text.replace(text_token(token), value).replace(token, value)
+    return RenderedEmail(subject, html, text)
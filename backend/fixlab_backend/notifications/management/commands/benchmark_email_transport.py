@@ -0,0 +1,42 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from notifications.transport import EmailMessage, FakeTransport
+
+
+class Command(BaseCommand):
+    help = "Measure email throughput offline against FakeTransport with a simulated round-trip."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=2000, help="Messages to send.")
+        parser.add_argument("--latency", type=float, default=0.05,
+                            help="Simulated seconds per provider request.")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Threads for the one-request-per-message run.")
+
+    def handle(self, *args, **options):
+        count, latency = options["count"], options["latency"]
+        messages = [
+            EmailMessage("Benchmark", "<p>Hello -email-</p>", f"user{i}@example.com", {"-email-": f"user{i}"})
+            for i in range(count)
+        ]
+
+        transport = FakeTransport(latency=latency)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            list(pool.map(transport.send, messages))
+        self._report("send() x%s threads" % options["workers"], count, transport.request_count, started)
+
+        transport = FakeTransport(latency=latency)
+        started = time.perf_counter()
+        transport.send_many(messages)
+        self._report("send_many()", count, transport.request_count, started)
+
+    def _report(self, label, count, request_count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label}: {count} messages in {request_count} requests, "
+            f"{elapsed:.2f}s ({count / elapsed:.0f} msg/s)"
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import process_queue
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound emails with a bounded thread pool, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the queue once and exit instead of polling forever.")
+        parser.add_argument("--batch-size", type=int, default=50,
+                            help="Emails claimed per batch.")
+        parser.add_argument("--workers", type=int, default=4,
+                            help="Concurrent SendGrid requests.")
+        parser.add_argument("--interval", type=float, default=5,
+                            help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = process_queue(options["batch_size"], options["workers"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
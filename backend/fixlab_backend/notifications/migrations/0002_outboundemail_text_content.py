@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='text_content',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """ Outbox row for an email waiting to be delivered by the process_email_queue worker """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),   # Waiting for its next delivery attempt
+        ('sending', 'Sending'),   # Claimed by a worker
+        ('sent', 'Sent'),         # Accepted by SendGrid
+        ('failed', 'Failed'),     # Gave up after max_attempts
+    )
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    text_content = models.TextField(blank=True)   # Plain-text alternative, optional
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
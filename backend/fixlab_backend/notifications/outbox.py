@@ -0,0 +1,132 @@
+"""
+DB-backed outbox for transactional email.
+
+Request handlers call `enqueue_email()`, which only inserts a row. The
+`process_email_queue` management command claims due rows, sends them from a
+bounded thread pool and records the outcome, retrying failures with
+exponential backoff.
+"""
+import logging
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+from .transport import DeliveryError, EmailMessage, get_transport
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, "EMAIL_QUEUE_MAX_ATTEMPTS", 5)
+BACKOFF_BASE = getattr(settings, "EMAIL_QUEUE_BACKOFF_BASE", 30)      # seconds
+BACKOFF_MAX = getattr(settings, "EMAIL_QUEUE_BACKOFF_MAX", 60 * 60)   # seconds
+# A 'sending' row older than this belongs to a worker that died mid-batch
+CLAIM_TIMEOUT = getattr(settings, "EMAIL_QUEUE_CLAIM_TIMEOUT", 10 * 60)
+
+
+def enqueue_email(subject, html_content, to_email, text_content="", max_attempts=MAX_ATTEMPTS):
+    """ Queue an email for the background worker; never talks to SendGrid """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content,
+        to_email=to_email,
+        max_attempts=max_attempts,
+    )
+
+
+def backoff_delay(attempts):
+    """ Seconds to wait before the next attempt: exponential with jitter, capped """
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(attempts - 1, 0)))
+    return delay + random.uniform(0, delay / 10)
+
+
+def claim_batch(limit):
+    """
+    Mark up to `limit` due emails as 'sending' for this worker and return them.
+
+    Claiming is a single conditional UPDATE tagged with a random token, so
+    concurrent workers never pick up the same row.
+    """
+    now = timezone.now()
+    due = (
+        Q(status="pending", next_attempt_at__lte=now)
+        | Q(status="sending", claimed_at__lt=now - timedelta(seconds=CLAIM_TIMEOUT))
+    )
+    ids = list(
+        OutboundEmail.objects.filter(due).order_by("next_attempt_at").values_list("id", flat=True)[:limit]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    OutboundEmail.objects.filter(Q(id__in=ids) & due).update(
+        status="sending", claim_token=token, claimed_at=now
+    )
+    return list(OutboundEmail.objects.filter(claim_token=token, status="sending"))
+
+
+def _deliver(email):
+    try:
+        get_transport().send(
+            EmailMessage(email.subject, email.html_content, email.to_email, text_content=email.text_content)
+        )
+        return True, ""
+    except DeliveryError as e:
+        return False, str(e)
+    except Exception as e:
+        # A bug in one send must not abort the batch and strand its claimed rows
+        logger.exception("Unexpected error sending email %s to %s", email.id, email.to_email)
+        return False, f"{type(e).__name__}: {e}"
+
+
+def record_result(email, ok, error=""):
+    """ Persist the outcome of one delivery attempt """
+    now = timezone.now()
+    email.attempts += 1
+    email.claim_token = ""
+    email.claimed_at = None
+    if ok:
+        email.status = "sent"
+        email.sent_at = now
+        email.last_error = ""
+    elif email.attempts >= email.max_attempts:
+        email.status = "failed"
+        email.last_error = error
+    else:
+        email.status = "pending"
+        email.next_attempt_at = now + timedelta(seconds=backoff_delay(email.attempts))
+        email.last_error = error
+    email.save(update_fields=[
+        "attempts", "status", "sent_at", "last_error", "next_attempt_at", "claim_token", "claimed_at",
+    ])
+
+
+def process_queue(batch_size=50, workers=4):
+    """
+    Claim one batch, send it concurrently and record the results.
+
+    Only the HTTP calls run in the pool; all database writes happen on the
+    calling thread so worker threads never hold their own DB connections.
+    Returns (sent, failed) counts for the batch.
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_deliver, emails))
+
+    sent = failed = 0
+    for email, (ok, error) in zip(emails, results):
+        record_result(email, ok, error)
+        if ok:
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
@@ -0,0 +1,90 @@
+from django.test import SimpleTestCase, TestCase
+
+from .emails import html_to_text, personalize, render_email, substitutions, text_token
+from .models import OutboundEmail
+from .outbox import enqueue_email, process_queue
+from .transport import set_transport
+
+
+class RenderEmailTests(SimpleTestCase):
+    """ The shared renderer: escaping, per-recipient tokens and the plain-text part """
+
+    def render(self, **kwargs):
+        fields = {"subject": "Hi", "title": "Welcome", "message": "<p>Body</p>"}
+        fields.update(kwargs)
+        return render_email(**fields)
+
+    def test_escapes_untrusted_fields_but_not_message(self):
+        email = self.render(
+            title="<script>x</script>", greeting="O'Brien",
+            rows=(("Course", "<b>Repairs</b>"),), message="<strong>trusted</strong>",
+        )
+        self.assertNotIn("<script>", email.html)
+        self.assertIn("&lt;script&gt;", email.html)
+        self.assertIn("O&#x27;Brien", email.html)
+        self.assertIn("&lt;b&gt;Repairs&lt;/b&gt;", email.html)
+        self.assertIn("<strong>trusted</strong>", email.html)
+
+    def test_text_part_is_plain(self):
+        email = self.render(
+            greeting="O'Brien", rows=(("Reference", "FX-1"),),
+            message="Read <a href='https://fixlab.test/post'>the post</a>.<br>Thanks &amp; bye",
+        )
+        self.assertNotIn("<", email.text)
+        self.assertIn("O'Brien", email.text)
+        self.assertIn("the post (https://fixlab.test/post)", email.text)
+        self.assertIn("Thanks & bye", email.text)
+        self.assertIn("FX-1", email.text)
+
+    def test_html_to_text(self):
+        self.assertEqual(html_to_text("<p>One</p><p>Two</p>"), "One\n\nTwo")
+        self.assertEqual(html_to_text("a<br>b<br/>c"), "a\nb\nc")
+        self.assertEqual(html_to_text("<a href='https://x.test'>https://x.test</a>"), "https://x.test")
+        self.assertEqual(html_to_text("1 &lt; 2"), "1 < 2")
+
+    def test_personalize_escapes_html_only(self):
+        email = self.render(subject="Hi -name-", greeting="-name-", tokens=("-name-",))
+        personal = personalize(email, {"-name-": "O'Brien <x>"})
+        self.assertEqual(personal.subject, "Hi O'Brien <x>")
+        self.assertIn("O&#x27;Brien &lt;x&gt;", personal.html)
+        self.assertIn("O'Brien <x>", personal.text)
+        self.assertNotIn("-name-", personal.html + personal.text)
+        self.assertNotIn(text_token("-name-"), personal.text)
+
+    def test_tokens_are_separate_in_text_part(self):
+        email = self.render(greeting="-name-", tokens=("-name-",))
+        self.assertIn("-name-", email.html)
+        self.assertNotIn("-name-", email.text)
+        self.assertIn(text_token("-name-"), email.text)
+        # SendGrid replaces substrings, so one token must not contain the other
+        self.assertNotIn("-name-", text_token("-name-"))
+
+    def test_substitutions(self):
+        self.assertEqual(substitutions({"-name-": "O'Brien"}), {
+            "-name-": "O&#x27;Brien",
+            text_token("-name-"): "O'Brien",
+        })
+
+
+class BrokenTransport:
+    def send(self, message):
+        if message.to_email.startswith("bug"):
+            raise KeyError("personalizations")
+
+
+class ProcessQueueTests(TestCase):
+    def setUp(self):
+        self.previous = set_transport(BrokenTransport())
+
+    def tearDown(self):
+        set_transport(self.previous)
+
+    def test_unexpected_error_is_recorded_as_failure(self):
+        enqueue_email("Hi", "<p>Hi</p>", "bug@fixlab.test")
+        enqueue_email("Hi", "<p>Hi</p>", "ok@fixlab.test")
+        with self.assertLogs("notifications.outbox", "ERROR"):
+            self.assertEqual(process_queue(), (1, 1))
+        failed = OutboundEmail.objects.get(to_email="bug@fixlab.test")
+        self.assertEqual((failed.status, failed.attempts), ("pending", 1))
+        self.assertIn("KeyError", failed.last_error)
+        self.assertEqual(OutboundEmail.objects.get(to_email="ok@fixlab.test").status, "sent")
@@ -0,0 +1,185 @@
+"""
+Shared mail transport for every app.
+
+One transport instance is built per process (see `get_transport()`), so the
+SendGrid transport keeps a pool of keep-alive HTTPS connections instead of
+opening a new TLS connection per message. The transport class comes from
+settings.EMAIL_TRANSPORT; point it at `FakeTransport` to run or benchmark
+everything offline.
+"""
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FROM_EMAIL = "noreply@fixlabtech.com"   # must be verified in SendGrid
+
+# `substitutions` maps tokens in the content to per-recipient values;
+# `text_content` is the optional plain-text alternative
+EmailMessage = namedtuple(
+    "EmailMessage", "subject html_content to_email substitutions text_content", defaults=(None, "")
+)
+
+
+class DeliveryError(Exception):
+    """ Raised when the provider does not accept a message """
+
+
+class BaseTransport:
+    # Most recipients one provider request may carry
+    max_batch_size = 1
+
+    def send(self, message):
+        """ Deliver one EmailMessage or raise DeliveryError """
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        """
+        Deliver messages sharing subject and body in one request, or raise
+        DeliveryError. Only called with up to max_batch_size messages.
+        """
+        for message in messages:
+            self.send(message)
+
+    def send_many(self, messages):
+        """
+        Deliver several messages; returns a list of (ok, error) in input order.
+
+        Messages sharing subject and bodies are grouped into batches of
+        max_batch_size, and a failed batch fails every message in it.
+        """
+        groups = {}
+        for index, message in enumerate(messages):
+            groups.setdefault((message.subject, message.html_content, message.text_content), []).append(index)
+
+        results = [None] * len(messages)
+        for indexes in groups.values():
+            for start in range(0, len(indexes), self.max_batch_size):
+                chunk = indexes[start:start + self.max_batch_size]
+                try:
+                    self.send_batch([messages[i] for i in chunk])
+                    outcome = (True, "")
+                except DeliveryError as e:
+                    logger.warning("Batch of %s emails failed: %s", len(chunk), e)
+                    outcome = (False, str(e))
+                for i in chunk:
+                    results[i] = outcome
+        return results
+
+
+class SendGridTransport(BaseTransport):
+    """ SendGrid v3 Web API over a pooled, keep-alive requests.Session """
+    API_URL = "https://api.sendgrid.com/v3/mail/send"
+    # One personalization per recipient, SendGrid allows 1000 per request
+    max_batch_size = 1000
+
+    def __init__(self, api_key=None, from_email=DEFAULT_FROM_EMAIL, pool_size=None, timeout=None):
+        self.from_email = from_email
+        self.timeout = timeout or (
+            getattr(settings, "SENDGRID_CONNECT_TIMEOUT", 3.05),
+            getattr(settings, "SENDGRID_READ_TIMEOUT", 15),
+        )
+        pool_size = pool_size or getattr(settings, "SENDGRID_POOL_SIZE", 10)
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key or os.getenv('SENDGRID_API_KEY')}",
+            "Content-Type": "application/json",
+        })
+
+    def send(self, message):
+        self.send_batch([message])
+
+    @staticmethod
+    def _content(message):
+        # SendGrid wants text/plain listed before text/html
+        content = [{"type": "text/html", "value": message.html_content}]
+        if message.text_content:
+            content.insert(0, {"type": "text/plain", "value": message.text_content})
+        return content
+
+    def send_batch(self, messages):
+        payload = {
+            "from": {"email": self.from_email},
+            "subject": messages[0].subject,
+            "content": self._content(messages[0]),
+            "personalizations": [
+                {"to": [{"email": m.to_email}], "substitutions": m.substitutions or {}}
+                for m in messages
+            ],
+        }
+        try:
+            response = self.session.post(self.API_URL, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise DeliveryError(str(e)) from e
+        if response.status_code >= 400:
+            raise DeliveryError(f"SendGrid returned {response.status_code}: {response.text[:500]}")
+
+
+class FakeTransport(BaseTransport):
+    """
+    In-memory transport for tests and offline benchmarks.
+
+    `latency` simulates the provider round-trip per request and batching
+    mirrors SendGrid's, so throughput numbers are comparable with the real
+    transport's request count.
+    """
+    max_batch_size = SendGridTransport.max_batch_size
+
+    def __init__(self, latency=None, fail_for=()):
+        self.latency = getattr(settings, "FAKE_EMAIL_LATENCY", 0) if latency is None else latency
+        self.fail_for = set(fail_for)
+        self.outbox = []
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        self.send_batch([message])
+
+    def send_batch(self, messages):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.request_count += 1
+            for message in messages:
+                if message.to_email in self.fail_for:
+                    raise DeliveryError(f"Fake failure for {message.to_email}")
+            self.outbox.extend(messages)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """ Process-wide transport built from settings.EMAIL_TRANSPORT """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                path = getattr(settings, "EMAIL_TRANSPORT", "notifications.transport.SendGridTransport")
+                _transport = import_string(path)()
+    return _transport
+
+
+def set_transport(transport):
+    """ Swap the process-wide transport (tests and benchmarks); returns the previous one """
+    global _transport
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    return previous
+
+
+def send_many(messages):
+    """ Send a list of EmailMessage; returns a list of (ok, error) in input order """
+    return get_transport().send_many(messages)
@@ -0,0 +1,78 @@
+"""
+In-process course catalog.
+
+Courses change rarely but are read on every registration, so each process
+keeps all of them in memory, indexed by name and id. Saving or deleting a
+course bumps a version number in the shared cache (see signals.py); every
+process compares its snapshot against that version on access and reloads
+when it is behind. Snapshots are also reloaded after CATALOG_MAX_AGE
+seconds, which bounds staleness should the cache itself be per-process.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Course
+
+
+CATALOG_VERSION_KEY = "registrations:course_catalog_version"
+CATALOG_MAX_AGE = getattr(settings, "COURSE_CATALOG_MAX_AGE", 5 * 60)   # seconds
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+class CatalogSnapshot:
+    def __init__(self, version, courses):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.courses = sorted(courses, key=lambda course: course.name)
+        self.by_name = {course.name: course for course in self.courses}
+        self.by_id = {course.id: course for course in self.courses}
+        self._listing = None
+
+    def listing(self):
+        """ Serialized public course list, built once per snapshot """
+        if self._listing is None:
+            from .serializers import CourseSerializer
+            self._listing = CourseSerializer(self.courses, many=True).data
+        return self._listing
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never matches an old snapshot
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+
+
+def get_catalog():
+    """ The current snapshot, reloading it when a course changed or it is too old """
+    global _snapshot
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > CATALOG_MAX_AGE:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > CATALOG_MAX_AGE:
+                snapshot = _snapshot = CatalogSnapshot(version, Course.objects.all())
+    return snapshot
+
+
+def get_course_by_name(name):
+    return get_catalog().by_name.get(name)
+
+
+def get_course_by_id(course_id):
+    return get_catalog().by_id.get(course_id)
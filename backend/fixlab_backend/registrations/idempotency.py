@@ -0,0 +1,104 @@
+"""
+Idempotent registration initialization.
+
+A double-clicked form (or a client retry) must not start two Paystack
+transactions or create two pending registrations. Before Paystack is
+called, an attempt is matched against earlier ones:
+
+* with an `Idempotency-Key` header, by that key scoped to the action, email
+  and course; the hash is stored in Registration.idempotency_key (unique)
+* without one, by a pending (or paid) registration for the same email and
+  course created within the last REGISTRATION_IDEMPOTENCY_WINDOW seconds
+
+A match is answered with its reference and payment_url instead of a new
+transaction. Concurrent duplicates are told apart by a cache lock: only
+the holder initializes, the others get 409 at once rather than tying up a
+worker. The lock only spans processes when the cache is shared (Redis).
+Without Redis, the database still backs it: a keyless attempt stores the
+hash of its scope and window slot (see window_key) in the same unique
+column, so the second insert of a concurrent pair fails and is answered
+with the first. Only a pair straddling a slot boundary can get past both.
+
+A failed payment frees its key (see payments.fail_payment), so retrying
+after a failure starts a new transaction.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Registration
+
+
+IDEMPOTENCY_WINDOW = getattr(settings, "REGISTRATION_IDEMPOTENCY_WINDOW", 10 * 60)   # seconds
+# Longer than a slow Paystack initialize call, so the lock cannot expire mid-request
+LOCK_TIMEOUT = 60
+
+
+def _scope(action, email, course):
+    return f"{action}|{(email or '').strip().lower()}|{course.id}"
+
+
+def registration_key(request, action, email, course):
+    """ Hash of the client's Idempotency-Key within this action, email and course; None without one """
+    supplied = request.headers.get("Idempotency-Key")
+    if not supplied:
+        return None
+    return hashlib.sha256(f"header|{_scope(action, email, course)}|{supplied}".encode()).hexdigest()
+
+
+def window_key(action, email, course, now=None):
+    """ Stored key of a keyless attempt: its scope within the current IDEMPOTENCY_WINDOW slot """
+    slot = int((now or timezone.now()).timestamp() // IDEMPOTENCY_WINDOW)
+    return hashlib.sha256(f"window|{_scope(action, email, course)}|{slot}".encode()).hexdigest()
+
+
+def _lock_key(key, action, email, course):
+    name = key or hashlib.sha256(_scope(action, email, course).encode()).hexdigest()
+    return f"registrations:idempotency:lock:{name}"
+
+
+def payment_result(registration, message):
+    """ Response body of a successful initialization """
+    return {
+        "success": True,
+        "payment_url": registration.payment_url,
+        "reference_no": registration.reference_no,
+        "message": message,
+    }
+
+
+def find_result(key, email, course):
+    """ The earlier attempt's result for this key (or email and course), or None if there is none """
+    registrations = Registration.objects.exclude(payment_url="").only(
+        "reference_no", "payment_url", "payment_status"
+    )
+    if key:
+        registration = registrations.filter(idempotency_key=key).first()
+    else:
+        registration = (
+            registrations.filter(
+                email__iexact=(email or "").strip(),
+                course=course,
+                payment_status__in=("pending", "completed"),
+                created_at__gte=timezone.now() - timedelta(seconds=IDEMPOTENCY_WINDOW),
+            )
+            .order_by("-created_at")
+            .first()
+        )
+
+    if registration is None or registration.payment_status == "failed":
+        return None
+    if registration.payment_status == "completed":
+        return payment_result(registration, "This registration has already been paid.")
+    return payment_result(registration, "Registration already started. Redirect to Paystack to complete payment.")
+
+
+def acquire(key, action, email, course):
+    return cache.add(_lock_key(key, action, email, course), 1, LOCK_TIMEOUT)
+
+
+def release(key, action, email, course):
+    cache.delete(_lock_key(key, action, email, course))
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from registrations.models import Registration
+from registrations.payments import to_kobo
+from registrations.paystack import PaystackClient
+from registrations.paystack_stub import STATUSES, StubPaystackServer
+from registrations.reconcile import CHUNK, reconcile
+
+
+class Command(BaseCommand):
+    help = "Verify pending registrations with Paystack in bulk and settle their payment status."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Concurrent Paystack verify calls.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK,
+                            help="Pending registrations loaded and settled per batch.")
+        parser.add_argument("--min-age", type=int, default=30,
+                            help="Skip registrations younger than this many minutes (payment may be in progress).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report what would change without writing anything.")
+        parser.add_argument("--stub", action="store_true",
+                            help="Verify against a local Paystack stub server instead of the real API.")
+        parser.add_argument("--stub-status", choices=STATUSES, default="success",
+                            help="Status the stub reports for references that do not name one.")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        stub = None
+        if options["stub"]:
+            stub = StubPaystackServer(default_status=options["stub_status"]).start()
+            # The stub charges every pending reference its full course fee
+            stub.amounts = {
+                reference: to_kobo(fee) for reference, fee in
+                Registration.objects.filter(payment_status="pending").values_list("reference_no", "course__amount")
+            }
+            self.stdout.write(f"Using Paystack stub at {stub.url}")
+            client = PaystackClient(secret_key="sk_test_stub", base_url=stub.url, pool_size=workers)
+        else:
+            # Its own pool sized to the worker count, so no call waits for a connection
+            client = PaystackClient(pool_size=workers)
+
+        try:
+            report = reconcile(
+                client,
+                workers=workers,
+                chunk_size=options["chunk_size"],
+                min_age=timedelta(minutes=options["min_age"]),
+                dry_run=options["dry_run"],
+            )
+        finally:
+            if stub:
+                stub.stop()
+
+        prefix = "[dry run] would settle" if options["dry_run"] else "Settled"
+        self.stdout.write(
+            f"{prefix}: checked {report.checked}, completed {report.completed}, "
+            f"failed {report.failed}, unchanged {report.unchanged}, errors {len(report.errors)}"
+        )
+        for reference, error in report.errors[:20]:
+            self.stderr.write(f"  {reference}: {error}")
+        stats = client.metrics()["operations"].get("verify")
+        if stats:
+            self.stdout.write(f"Paystack verify latency: p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms")
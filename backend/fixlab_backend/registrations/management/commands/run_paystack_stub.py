@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from registrations.paystack_stub import STATUSES, StubPaystackServer
+
+
+class Command(BaseCommand):
+    help = "Run a local Paystack API stub; point PAYSTACK_BASE_URL at it to test payments offline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--status", choices=STATUSES, default="success",
+                            help="Status reported for references that do not name one.")
+        parser.add_argument("--latency", type=float, default=0.0,
+                            help="Seconds to delay each verify response.")
+
+    def handle(self, *args, **options):
+        server = StubPaystackServer(
+            port=options["port"], default_status=options["status"], latency=options["latency"], verbose=True
+        )
+        self.stdout.write(f"Paystack stub listening on {server.url} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
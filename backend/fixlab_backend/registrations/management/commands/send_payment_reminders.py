@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from registrations.reminders import CHUNK, send_reminders
+
+
+class Command(BaseCommand):
+    help = "Email reminders to registrations whose payment is still pending, in SendGrid batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and send reminders as they fall due.")
+        parser.add_argument("--interval", type=int, default=60 * 60,
+                            help="Seconds to sleep between runs when --loop is set.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK,
+                            help="Registrations loaded and sent per batch (max 1000).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Count the reminders that are due without sending them.")
+
+    def handle(self, *args, **options):
+        chunk_size = min(options["chunk_size"], 1000)
+        while True:
+            report = send_reminders(chunk_size, options["dry_run"])
+            if options["dry_run"]:
+                self.stdout.write(f"[dry run] {report.due} reminders due")
+            else:
+                self.stdout.write(f"Reminders: due {report.due}, sent {report.sent}, failed {report.failed}")
+                for reference, error in report.errors[:20]:
+                    self.stderr.write(f"  {reference}: {error}")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
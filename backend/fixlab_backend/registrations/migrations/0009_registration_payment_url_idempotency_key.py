@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0008_newslettersubscriber'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registration',
+            name='payment_url',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0009_registration_payment_url_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registration',
+            name='last_reminded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='reminder_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='registration',
+            index=models.Index(fields=['payment_status', 'created_at'], name='registration_status_created'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:10
+#
+# Brings the migration history in line with models.py, which had drifted
+# (Course.amount, Registration.reference_no and the profile fields were
+# never migrated). A database whose tables already have these columns
+# should apply this one with `migrate registrations 0011 --fake`.
+
+from django.db import migrations, models
+
+
+def fill_reference_numbers(apps, schema_editor):
+    """ Rows from before reference_no get a unique placeholder so the column can be made unique """
+    Registration = apps.get_model("registrations", "Registration")
+    for reg_id in Registration.objects.filter(reference_no__isnull=True).values_list("id", flat=True):
+        Registration.objects.filter(id=reg_id).update(reference_no=f"legacy-{reg_id}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrations', '0010_registration_reminders'),
+    ]
+
+    operations = [
+        # Subscribers live in blog.NewsletterSubscriber now; the old table is
+        # only dropped from the model state so any rows in it are kept
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.DeleteModel(
+                    name='NewsletterSubscriber',
+                ),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='registration',
+            name='mode_of_learning',
+        ),
+        migrations.RemoveField(
+            model_name='registration',
+            name='payment_option',
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='address',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='gender',
+            field=models.CharField(blank=True, choices=[('male', 'Male'), ('female', 'Female'), ('other', 'Other')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='occupation',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='registration',
+            name='reference_no',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.RunPython(fill_reference_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='registration',
+            name='reference_no',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='registration',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='registration',
+            name='payment_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
@@ -33,8 +33,20 @@ class Registration(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="registrations")
     payment_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     reference_no = models.CharField(max_length=100, unique=True)  # ✅ Paystack reference number
+    payment_url = models.URLField(max_length=500, blank=True)  # Paystack authorization URL, replayed on retries
+    # Hash of the client's Idempotency-Key (or, without one, the time slot) with action, email and course;
+    # cleared if the payment fails (see idempotency.py)
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Pending-payment reminders already sent (see reminders.py)
+    last_reminded_at = models.DateTimeField(null=True, blank=True)
+    reminder_count = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment_status', 'created_at'], name='registration_status_created'),
+        ]
 
     def __str__(self):
         return f"{self.full_name} - {self.course.name} ({self.payment_status})"
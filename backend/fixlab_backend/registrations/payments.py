@@ -0,0 +1,240 @@
+"""
+Payment state transitions shared by the Paystack webhook, the redirect
+verification endpoint and reconciliation.
+
+Every transition is a conditional UPDATE on payment_status, so however many
+webhook deliveries, page refreshes and reconciliation runs race on one
+reference, exactly one of them moves it to "completed", and only that one
+queues the notifications. The update and the queued emails (the outbox
+lives in the same database) commit together.
+"""
+import hashlib
+import hmac
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.emails import personalize, render_email
+from notifications.outbox import enqueue_email
+from .catalog import get_course_by_id
+from .models import Registration
+
+
+logger = logging.getLogger(__name__)
+
+SUPPORT_EMAIL = "support@fixlabtech.freshdesk.com"
+# Paystack statuses after which a pending registration will never be paid
+FAILED_STATUSES = frozenset(("failed", "abandoned", "reversed"))
+# Course fees are in naira; Paystack amounts are in kobo
+CURRENCY = "NGN"
+# Completed references are remembered this long, so refreshing the payment
+# page costs neither a Paystack call nor a query
+VERIFIED_CACHE_TIMEOUT = getattr(settings, "PAYMENT_VERIFIED_CACHE_TIMEOUT", 10 * 60)
+
+
+def valid_signature(payload, signature):
+    """ Check Paystack's x-paystack-signature: HMAC-SHA512 of the raw body with the secret key """
+    if not signature or not settings.PAYSTACK_SECRET_KEY:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), payload, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def to_kobo(amount):
+    return int(amount * 100)
+
+
+def course_fee(reference):
+    """ The course fee (naira) of the registration with `reference`, or None if there is none """
+    return Registration.objects.filter(reference_no=reference).values_list("course__amount", flat=True).first()
+
+
+def charge_matches(data, fee):
+    """
+    True if the Paystack transaction `data` paid `fee`, the course fee, in
+    full and in naira. Mismatches (or an unknown fee) are logged.
+    """
+    if fee is not None and data.get("currency") == CURRENCY and data.get("amount") == to_kobo(fee):
+        return True
+    logger.warning(
+        "Charge for %s not applied: %s %s does not match the course fee %s %s",
+        data.get("reference"), data.get("amount"), data.get("currency"),
+        None if fee is None else to_kobo(fee), CURRENCY,
+    )
+    return False
+
+
+def _verified_key(reference):
+    # References come from the query string; hash them into a safe cache key
+    return f"registrations:verified:{hashlib.md5(reference.encode()).hexdigest()}"
+
+
+def remember_verified(references):
+    cache.set_many({_verified_key(reference): True for reference in references}, VERIFIED_CACHE_TIMEOUT)
+
+
+def is_verified(reference):
+    """ True if the reference is known to be paid, without touching the database """
+    return cache.get(_verified_key(reference)) is not None
+
+
+def outcome_for(res, fee):
+    """
+    "completed", "failed" or None (still in progress / unknown) for a Paystack
+    verify response on a registration whose course costs `fee`. A successful
+    charge for the wrong amount or currency is None: it stays pending for
+    review.
+    """
+    if not res.get("status"):
+        return None
+    data = res.get("data") or {}
+    paystack_status = data.get("status")
+    if paystack_status == "success":
+        return "completed" if charge_matches(data, fee) else None
+    if paystack_status in FAILED_STATUSES:
+        return "failed"
+    return None
+
+
+def complete_payment(reference):
+    """
+    Mark a pending (or earlier failed) registration as paid. Returns True only
+    for the caller that made the transition; that caller queued the emails.
+    """
+    with transaction.atomic():
+        updated = Registration.objects.filter(
+            reference_no=reference, payment_status__in=("pending", "failed")
+        ).update(payment_status="completed")
+        if updated:
+            send_payment_notifications(Registration.objects.select_related("course").get(reference_no=reference))
+    if updated:
+        remember_verified([reference])
+    return bool(updated)
+
+
+def fail_payment(reference):
+    """
+    Mark a still-pending registration as failed; a completed one is never
+    downgraded. Its idempotency key is freed so the student can retry.
+    """
+    return bool(
+        Registration.objects.filter(reference_no=reference, payment_status="pending").update(
+            payment_status="failed", idempotency_key=None
+        )
+    )
+
+
+def get_payment_status(reference):
+    """ payment_status of a reference, or None if no registration has it """
+    return Registration.objects.filter(reference_no=reference).values_list("payment_status", flat=True).first()
+
+
+def apply_verification(reference, res):
+    """
+    Apply a Paystack verify response to the registration; returns its
+    resulting status. In-progress Paystack states and mismatched charges
+    leave it pending.
+    """
+    outcome = outcome_for(res, course_fee(reference))
+    if outcome == "completed":
+        complete_payment(reference)
+        return "completed"
+    if outcome == "failed" and fail_payment(reference):
+        return "failed"
+    return get_payment_status(reference)
+
+
+def settle_batch(outcomes):
+    """
+    Apply {registration id: "completed" | "failed"} for registrations that
+    are still pending, with the rows locked and one bulk_update. Returns the
+    registrations that actually changed; completed ones have their
+    notifications queued in the same transaction.
+    """
+    with transaction.atomic():
+        rows = list(
+            Registration.objects.select_for_update()
+            .filter(id__in=outcomes, payment_status="pending")
+        )
+        for reg in rows:
+            reg.payment_status = outcomes[reg.id]
+            if reg.payment_status == "failed":
+                reg.idempotency_key = None
+        Registration.objects.bulk_update(rows, ["payment_status", "idempotency_key"])
+
+        for reg in rows:
+            if reg.payment_status == "completed":
+                # Courses come from the in-process catalog, not one query per row
+                reg.course = get_course_by_id(reg.course_id) or reg.course
+                send_payment_notifications(reg)
+    remember_verified([reg.reference_no for reg in rows if reg.payment_status == "completed"])
+    return rows
+
+
+# Filled in per registration; each payment email is rendered once with these in place
+NAME, EMAIL, PHONE, COURSE, AMOUNT, REFERENCE, DATE = (
+    "-full_name-", "-email-", "-phone-", "-course-", "-amount-", "-reference_no-", "-date-"
+)
+
+PAYMENT_EMAILS = {
+    ("new", "student"): dict(
+        subject="Course Registration",
+        title="Payment Confirmed",
+        greeting=NAME,
+        message=f"Your registration for <strong>{COURSE}</strong> has been confirmed.",
+        rows=(("Course", COURSE), ("Amount Paid", AMOUNT), ("Reference No.", REFERENCE), ("Date", DATE)),
+        footer="Our academic support team will contact you within 24 hours with your LMS credentials and schedule. <br><i>Thank you!</i>",
+    ),
+    ("new", "support"): dict(
+        subject="New Registration Received",
+        title="New Registration Payment Received",
+        message="A new student has successfully registered and paid.",
+        rows=(("Name", NAME), ("Email", EMAIL), ("Phone", PHONE), ("Course", COURSE),
+              ("Amount Paid", AMOUNT), ("Reference", REFERENCE), ("Date", DATE)),
+        footer="Create a new LMS account and send credentials within 24 hours.",
+    ),
+    ("additional", "student"): dict(
+        subject="Course Registration",
+        title="Payment Confirmed",
+        greeting=NAME,
+        message=f"Your payment for the <strong>additional course {COURSE}</strong> has been successfully received.",
+        rows=(("Course", COURSE), ("Amount Paid", AMOUNT), ("Reference No.", REFERENCE), ("Date", DATE)),
+        footer="Thank you for continuing your learning journey with <strong>Fixlab Academy, your LMS account will be updated with the new course within 24 hours</strong>.<br><i>Thank you!</i>",
+    ),
+    ("additional", "support"): dict(
+        subject=f"New Course Payment Received - {NAME}",
+        title="New Course Payment Received",
+        message=f"Student <strong>{NAME}</strong> has successfully paid for a new course.",
+        rows=(("Course", COURSE), ("Amount Paid", AMOUNT), ("Reference", REFERENCE), ("Date", DATE)),
+        footer="Update student LMS account with the new course within 24 hours.",
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def payment_email(kind, audience, year):
+    """ The tokenized email for `kind` and `audience`; `year` keys the cache to the copyright line """
+    return render_email(rows_title="Registration Details", **PAYMENT_EMAILS[kind, audience])
+
+
+def send_payment_notifications(reg):
+    """ Queue the student confirmation and the support notice for a completed payment """
+    completed_courses = Registration.objects.filter(email=reg.email, payment_status="completed").exclude(id=reg.id)
+    kind = "additional" if completed_courses.exists() else "new"
+    values = {
+        NAME: reg.full_name,
+        EMAIL: reg.email,
+        PHONE: reg.phone,
+        COURSE: reg.course.name,
+        AMOUNT: f"₦{reg.course.amount}",
+        REFERENCE: reg.reference_no,
+        DATE: reg.created_at.strftime("%d %B %Y, %I:%M %p"),
+    }
+    year = timezone.now().year
+    for audience, to_email in (("student", reg.email), ("support", SUPPORT_EMAIL)):
+        email = personalize(payment_email(kind, audience, year), values)
+        enqueue_email(email.subject, email.html, to_email, email.text)
@@ -0,0 +1,211 @@
+"""
+Paystack API client shared by the registration and payment views.
+
+A single client per process keeps a pooled requests.Session, applies the
+same connect/read timeouts to every call, records latency per operation and
+trips a circuit breaker after repeated failures so a degraded Paystack makes
+requests fail fast instead of tying up workers. The latency figures and
+breaker state are logged as one JSON line every METRICS_LOG_INTERVAL
+seconds of traffic; they are not exposed over HTTP.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+METRICS_LOG_INTERVAL = getattr(settings, "PAYSTACK_METRICS_LOG_INTERVAL", 5 * 60)   # seconds; 0 disables
+
+
+class PaystackError(Exception):
+    """ Paystack could not be reached or returned an unusable response """
+
+
+class PaystackUnavailable(PaystackError):
+    """ Network failure, 5xx, or the circuit breaker is open """
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused for `reset_timeout` seconds; then a single trial call
+    is let through and its outcome closes or re-opens the circuit.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # Open, or half-open with the trial call already in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Paystack circuit opened after %s failures", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LatencyStats:
+    """ Per-operation call counts, errors and latency percentiles over a recent window """
+
+    def __init__(self, window=200):
+        self.window = window
+        self._ops = {}
+        self._lock = threading.Lock()
+        self._logged_at = time.monotonic()
+
+    def log_due(self, interval):
+        """ True once per `interval` seconds, for the caller that should log a snapshot """
+        with self._lock:
+            now = time.monotonic()
+            if not interval or now - self._logged_at < interval:
+                return False
+            self._logged_at = now
+            return True
+
+    def record(self, operation, elapsed_ms, ok):
+        with self._lock:
+            op = self._ops.setdefault(operation, {"calls": 0, "errors": 0, "samples": deque(maxlen=self.window)})
+            op["calls"] += 1
+            op["errors"] += 0 if ok else 1
+            op["samples"].append(elapsed_ms)
+
+    @staticmethod
+    def _percentile(samples, pct):
+        """ Nearest-rank percentile of an already sorted list """
+        if not samples:
+            return None
+        return round(samples[max(0, math.ceil(len(samples) * pct / 100) - 1)], 1)
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for operation, op in self._ops.items():
+                samples = sorted(op["samples"])
+                result[operation] = {
+                    "calls": op["calls"],
+                    "errors": op["errors"],
+                    "p50_ms": self._percentile(samples, 50),
+                    "p95_ms": self._percentile(samples, 95),
+                    "max_ms": self._percentile(samples, 100),
+                }
+            return result
+
+
+class PaystackClient:
+    def __init__(self, secret_key=None, base_url=None, timeout=None, pool_size=None, breaker=None,
+                 metrics_log_interval=METRICS_LOG_INTERVAL):
+        self.base_url = (base_url or getattr(settings, "PAYSTACK_BASE_URL", "https://api.paystack.co")).rstrip("/")
+        self.timeout = timeout or (
+            getattr(settings, "PAYSTACK_CONNECT_TIMEOUT", 3.05),
+            getattr(settings, "PAYSTACK_READ_TIMEOUT", 10),
+        )
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=getattr(settings, "PAYSTACK_BREAKER_THRESHOLD", 5),
+            reset_timeout=getattr(settings, "PAYSTACK_BREAKER_RESET", 30),
+        )
+        self.stats = LatencyStats()
+        self.metrics_log_interval = metrics_log_interval
+
+        pool_size = pool_size or getattr(settings, "PAYSTACK_POOL_SIZE", 10)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {secret_key or settings.PAYSTACK_SECRET_KEY}",
+        })
+
+    def _request(self, operation, method, path, **kwargs):
+        """
+        Call Paystack and return its JSON body.
+
+        4xx responses are returned as-is because Paystack explains them in the
+        body ({"status": false, "message": ...}); network errors and 5xx count
+        against the circuit breaker and raise PaystackUnavailable.
+        """
+        if not self.breaker.allow_request():
+            raise PaystackUnavailable("Paystack is temporarily unavailable, please try again shortly.")
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self._record(operation, (time.perf_counter() - started) * 1000, ok=False)
+            raise PaystackUnavailable(str(e)) from e
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code >= 500:
+            self._record(operation, elapsed_ms, ok=False)
+            raise PaystackUnavailable(f"Paystack returned {response.status_code}")
+
+        self._record(operation, elapsed_ms, ok=True)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise PaystackError("Invalid response from Paystack") from e
+
+    def _record(self, operation, elapsed_ms, ok):
+        self.stats.record(operation, elapsed_ms, ok)
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        if self.stats.log_due(self.metrics_log_interval):
+            logger.info("paystack_metrics %s", json.dumps(self.metrics(), sort_keys=True))
+
+    def initialize_transaction(self, email, amount, callback_url):
+        """ Start a transaction; `amount` is in kobo """
+        payload = {"email": email, "amount": amount, "callback_url": callback_url}
+        return self._request("initialize", "POST", "/transaction/initialize", json=payload)
+
+    def verify_transaction(self, reference):
+        return self._request("verify", "GET", f"/transaction/verify/{reference}")
+
+    def metrics(self):
+        return {"circuit": self.breaker.state, "operations": self.stats.snapshot()}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """ Process-wide Paystack client """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient()
+    return _client
@@ -0,0 +1,106 @@
+"""
+Minimal local stand-in for the Paystack API, for exercising payment code
+without network access or live keys.
+
+Serves the two endpoints the app uses:
+
+* POST /transaction/initialize -> a fresh reference and authorization URL
+* GET  /transaction/verify/<reference> -> a transaction whose status is
+  taken from the reference itself when it contains one of the Paystack
+  statuses (e.g. "ref-failed-12" -> "failed"), else `default_status`. Its
+  amount is the one the reference was initialized with, or was set in
+  `server.amounts`, in NGN
+
+Point PAYSTACK_BASE_URL (or a PaystackClient's base_url) at `server.url`.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+STATUSES = ("success", "failed", "abandoned", "reversed", "ongoing", "pending")
+STATUS_RE = re.compile(rf"({'|'.join(STATUSES)})")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so a pooled client reuses its connections as it would with Paystack
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/transaction/initialize":
+            return self._reply(404, {"status": False, "message": "Not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        reference = uuid.uuid4().hex[:12]
+        self.server.amounts[reference] = payload.get("amount")
+        return self._reply(200, {
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "reference": reference,
+                "access_code": reference,
+                "authorization_url": f"{self.server.url}/checkout/{reference}?email={payload.get('email', '')}",
+            },
+        })
+
+    def do_GET(self):
+        prefix = "/transaction/verify/"
+        if not self.path.startswith(prefix):
+            return self._reply(404, {"status": False, "message": "Not found"})
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        reference = self.path[len(prefix):].strip("/")
+        match = STATUS_RE.search(reference)
+        return self._reply(200, {
+            "status": True,
+            "message": "Verification successful",
+            "data": {
+                "reference": reference,
+                "status": match.group(1) if match else self.server.default_status,
+                "amount": self.server.amounts.get(reference),
+                "currency": "NGN",
+            },
+        })
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubPaystackServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients wait on SYN retries
+    request_queue_size = 128
+
+    def __init__(self, host="127.0.0.1", port=0, default_status="success", latency=0.0, verbose=False):
+        super().__init__((host, port), StubHandler)
+        self.default_status = default_status
+        # {reference: amount in kobo} reported by verify
+        self.amounts = {}
+        self.latency = latency
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """ Serve from a daemon thread; returns self """
+        threading.Thread(target=self.serve_forever, name="paystack-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
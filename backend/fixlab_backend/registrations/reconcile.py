@@ -0,0 +1,86 @@
+"""
+Bulk reconciliation of pending registrations against Paystack.
+
+Pending references are streamed in id order, CHUNK at a time. Each chunk is
+verified concurrently from a bounded thread pool sharing one pooled
+PaystackClient, then settled with a single locked bulk_update (see
+payments.settle_batch). Only the HTTP calls run in the pool; all database
+work stays on the calling thread.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Registration
+from .payments import outcome_for, settle_batch
+from .paystack import PaystackError
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 200
+
+
+@dataclass
+class ReconcileReport:
+    checked: int = 0
+    completed: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    errors: list = field(default_factory=list)
+
+
+def pending_chunks(older_than, chunk_size=CHUNK):
+    """ Yield lists of (id, reference_no, course fee) of pending registrations created before `older_than` """
+    last_id = 0
+    while True:
+        chunk = list(
+            Registration.objects.filter(payment_status="pending", created_at__lt=older_than, id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "reference_no", "course__amount")[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+def reconcile(client, workers=8, chunk_size=CHUNK, min_age=timedelta(minutes=30), dry_run=False, report=None):
+    """
+    Verify every pending registration older than `min_age` and apply the
+    results. With dry_run nothing is written; the report says what would be.
+    """
+    report = report or ReconcileReport()
+    older_than = timezone.now() - min_age
+
+    def verify(row):
+        _, reference, fee = row
+        try:
+            return outcome_for(client.verify_transaction(reference), fee), None
+        except PaystackError as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk in pending_chunks(older_than, chunk_size):
+            outcomes = {}
+            for (reg_id, reference, _), (outcome, error) in zip(chunk, pool.map(verify, chunk)):
+                report.checked += 1
+                if error:
+                    report.errors.append((reference, error))
+                elif outcome:
+                    outcomes[reg_id] = outcome
+                else:
+                    report.unchanged += 1
+
+            if dry_run:
+                changed = outcomes.values()
+            else:
+                changed = [reg.payment_status for reg in settle_batch(outcomes)] if outcomes else []
+                # Rows settled elsewhere (webhook, redirect) meanwhile count as unchanged
+                report.unchanged += len(outcomes) - len(changed)
+            report.completed += sum(1 for s in changed if s == "completed")
+            report.failed += sum(1 for s in changed if s == "failed")
+    return report
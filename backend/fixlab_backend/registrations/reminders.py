@@ -0,0 +1,115 @@
+"""
+Reminders for registrations whose payment is still pending.
+
+The `send_payment_reminders` command streams due registrations in id
+order, CHUNK at a time, with their course joined in. A registration is due
+once it is REMINDER_DELAY old, at most every REMINDER_INTERVAL, and until
+it has had REMINDER_MAX_COUNT reminders. Each chunk is handed to the shared
+transport in one go: the body is built once per course with the student's
+name and reference as SendGrid substitutions, so a course's reminders go
+out as one request. Only successful sends are recorded.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.html import escape
+
+from notifications.emails import render_email, substitutions
+from notifications.transport import EmailMessage, send_many
+
+from .models import Registration
+
+
+REMINDER_DELAY = timedelta(days=getattr(settings, "PAYMENT_REMINDER_DELAY_DAYS", 4))
+REMINDER_INTERVAL = timedelta(days=getattr(settings, "PAYMENT_REMINDER_INTERVAL_DAYS", 3))
+REMINDER_MAX_COUNT = getattr(settings, "PAYMENT_REMINDER_MAX_COUNT", 3)
+CHUNK = 500
+
+NAME_TOKEN = "-full_name-"
+REFERENCE_TOKEN = "-reference_no-"
+
+
+@dataclass
+class ReminderReport:
+    due: int = 0
+    sent: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+
+def due_reminders(now):
+    """ Pending registrations owed a reminder at `now` """
+    return Registration.objects.filter(
+        Q(last_reminded_at__isnull=True) | Q(last_reminded_at__lte=now - REMINDER_INTERVAL),
+        payment_status="pending",
+        created_at__lte=now - REMINDER_DELAY,
+        reminder_count__lt=REMINDER_MAX_COUNT,
+    )
+
+
+def due_chunks(now, chunk_size=CHUNK):
+    """ Yield lists of due registrations with their course, in id order """
+    last_id = 0
+    while True:
+        chunk = list(
+            due_reminders(now).filter(id__gt=last_id)
+            .select_related("course")
+            .only("id", "full_name", "email", "reference_no", "course__name")
+            .order_by("id")[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def build_reminder_email(course):
+    """ The email shared by every pending registration for `course`, with tokens for theirs """
+    return render_email(
+        subject=f"🔔 Payment Reminder - {course.name}",
+        title="Payment Reminder",
+        greeting=NAME_TOKEN,
+        message=f"We noticed your payment for <strong>{escape(course.name)}</strong> is still pending.",
+        rows=(("Reference", REFERENCE_TOKEN),),
+        footer="Please complete your payment to confirm your registration.<br><br>"
+               "Thank you,<br><strong>Fixlab Academy Team</strong>",
+        tokens=(NAME_TOKEN, REFERENCE_TOKEN),
+    )
+
+
+def send_reminders(chunk_size=CHUNK, dry_run=False, report=None):
+    """ Remind every registration that is due now; with dry_run only count them """
+    report = report or ReminderReport()
+    now = timezone.now()
+    emails = {}
+
+    for chunk in due_chunks(now, chunk_size):
+        report.due += len(chunk)
+        if dry_run:
+            continue
+
+        messages = []
+        for reg in chunk:
+            if reg.course_id not in emails:
+                emails[reg.course_id] = build_reminder_email(reg.course)
+            email = emails[reg.course_id]
+            messages.append(EmailMessage(email.subject, email.html, reg.email, substitutions({
+                NAME_TOKEN: reg.full_name,
+                REFERENCE_TOKEN: reg.reference_no,
+            }), email.text))
+
+        sent_ids = []
+        for reg, (ok, error) in zip(chunk, send_many(messages)):
+            if ok:
+                sent_ids.append(reg.id)
+            else:
+                report.errors.append((reg.reference_no, error))
+        Registration.objects.filter(id__in=sent_ids).update(
+            last_reminded_at=now, reminder_count=F("reminder_count") + 1
+        )
+        report.sent += len(sent_ids)
+        report.failed += len(chunk) - len(sent_ids)
+    return report
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .catalog import get_course_by_name
 from .models import Registration, Course
 
 
@@ -8,9 +9,19 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'code', 'amount']
 
 
+class CatalogCourseField(serializers.SlugRelatedField):
+    """ Course by name, resolved from the in-process catalog instead of a query """
+
+    def to_internal_value(self, data):
+        course = get_course_by_name(data) if isinstance(data, str) else None
+        if course is None:
+            self.fail('does_not_exist', slug_name=self.slug_field, value=str(data))
+        return course
+
+
 class RegistrationSerializer(serializers.ModelSerializer):
     # Use course name instead of primary key
-    course = serializers.SlugRelatedField(
+    course = CatalogCourseField(
         queryset=Course.objects.all(),
         slug_field='name'
     )
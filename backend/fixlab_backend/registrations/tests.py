@@ -1,3 +1,444 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from notifications.models import OutboundEmail
+from notifications.emails import text_token
+from notifications.transport import FakeTransport, set_transport
+from . import catalog, idempotency
+from .models import Course, Registration
+from .payments import complete_payment, fail_payment, is_verified, outcome_for, settle_batch
+from . import paystack
+from .paystack import CircuitBreaker, PaystackClient
+from .paystack_stub import StubPaystackServer
+from .reconcile import reconcile
+from .reminders import NAME_TOKEN
+
+
+SECRET_KEY = "sk_test_webhook"
+
+
+class PaymentTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(name="Phone Repairs", amount=Decimal("50000.00"))
+
+    def register(self, reference, status="pending", email=None, age=timedelta(hours=1)):
+        reg = Registration.objects.create(
+            full_name="Ada O'Brien", email=email or f"{reference}@fixlab.test", phone="08000000000",
+            course=self.course, reference_no=reference, payment_status=status,
+        )
+        # created_at is auto_now_add; backdate it past reconcile's min_age
+        Registration.objects.filter(id=reg.id).update(created_at=timezone.now() - age)
+        return reg
+
+    def status_of(self, reference):
+        return Registration.objects.get(reference_no=reference).payment_status
+
+
+class PaymentTransitionTests(PaymentTestCase):
+    def test_outcome_for(self):
+        fee = self.course.amount
+        paid = {"status": "success", "amount": 5000000, "currency": "NGN"}
+        self.assertEqual(outcome_for({"status": True, "data": paid}, fee), "completed")
+        self.assertEqual(outcome_for({"status": True, "data": {"status": "abandoned"}}, fee), "failed")
+        self.assertIsNone(outcome_for({"status": True, "data": {"status": "ongoing"}}, fee))
+        self.assertIsNone(outcome_for({"status": False, "data": paid}, fee))
+        self.assertIsNone(outcome_for({"status": True, "data": None}, fee))
+
+    def test_outcome_for_mismatched_charge(self):
+        fee = self.course.amount
+        with self.assertLogs("registrations.payments", "WARNING"):
+            for data in ({"amount": 100, "currency": "NGN"}, {"amount": 5000000, "currency": "USD"}, {}):
+                self.assertIsNone(outcome_for({"status": True, "data": {"status": "success", **data}}, fee))
+            self.assertIsNone(outcome_for({"status": True, "data": {"status": "success", "amount": 0}}, None))
+
+    def test_complete_payment_once(self):
+        self.register("ref-1")
+        self.assertTrue(complete_payment("ref-1"))
+        self.assertFalse(complete_payment("ref-1"))
+        self.assertEqual(self.status_of("ref-1"), "completed")
+        self.assertTrue(is_verified("ref-1"))
+        # Student confirmation and support notice, queued only by the first call
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+        student = OutboundEmail.objects.get(to_email="ref-1@fixlab.test")
+        self.assertIn("Ada O&#x27;Brien", student.html_content)
+        self.assertIn("Ada O'Brien", student.text_content)
+
+    def test_fail_payment_frees_idempotency_key(self):
+        reg = self.register("ref-2")
+        Registration.objects.filter(id=reg.id).update(idempotency_key="k" * 64)
+        self.assertTrue(fail_payment("ref-2"))
+        reg.refresh_from_db()
+        self.assertEqual(reg.payment_status, "failed")
+        self.assertIsNone(reg.idempotency_key)
+        self.assertFalse(is_verified("ref-2"))
+
+    def test_settle_batch_skips_settled_rows(self):
+        pending = self.register("ref-3")
+        failing = self.register("ref-4")
+        done = self.register("ref-5", status="completed")
+        changed = settle_batch({pending.id: "completed", failing.id: "failed", done.id: "failed"})
+        self.assertEqual({reg.reference_no for reg in changed}, {"ref-3", "ref-4"})
+        self.assertEqual(self.status_of("ref-3"), "completed")
+        self.assertEqual(self.status_of("ref-4"), "failed")
+        self.assertEqual(self.status_of("ref-5"), "completed")
+        self.assertTrue(is_verified("ref-3"))
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+
+
+class ReconcileTests(PaymentTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubPaystackServer(default_status="ongoing").start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.client_ = PaystackClient(secret_key="sk_test_stub", base_url=self.stub.url)
+        references = ("x-success-1", "x-success-2", "x-failed-1", "x-abandoned-1", "x-ongoing-1", "x-plain-1")
+        for reference in references:
+            self.register(reference)
+        self.stub.amounts = dict.fromkeys(references, 5000000)
+        # Paid short, too recent to reconcile, and already settled
+        self.register("x-success-short")
+        self.stub.amounts["x-success-short"] = 100
+        self.register("x-success-new", age=timedelta(0))
+        self.register("x-failed-done", status="completed")
+
+    def test_reconcile(self):
+        with self.assertLogs("registrations.payments", "WARNING"):
+            report = reconcile(self.client_, workers=4, chunk_size=4, min_age=timedelta(minutes=30))
+        self.assertEqual((report.checked, report.completed, report.failed, report.unchanged), (7, 2, 2, 3))
+        self.assertEqual(report.errors, [])
+        self.assertEqual(self.status_of("x-success-1"), "completed")
+        self.assertEqual(self.status_of("x-failed-1"), "failed")
+        self.assertEqual(self.status_of("x-abandoned-1"), "failed")
+        self.assertEqual(self.status_of("x-ongoing-1"), "pending")
+        self.assertEqual(self.status_of("x-plain-1"), "pending")
+        self.assertEqual(self.status_of("x-success-short"), "pending")
+        self.assertEqual(self.status_of("x-success-new"), "pending")
+        self.assertEqual(self.status_of("x-failed-done"), "completed")
+        self.assertEqual(OutboundEmail.objects.count(), 4)
+
+    def test_dry_run_writes_nothing(self):
+        with self.assertLogs("registrations.payments", "WARNING"):
+            report = reconcile(self.client_, workers=4, min_age=timedelta(minutes=30), dry_run=True)
+        self.assertEqual((report.checked, report.completed, report.failed, report.unchanged), (7, 2, 2, 3))
+        self.assertEqual(Registration.objects.filter(payment_status="pending").count(), 8)
+        self.assertEqual(OutboundEmail.objects.count(), 0)
+
+    def test_unreachable_paystack_is_reported(self):
+        client = PaystackClient(secret_key="sk_test_stub", base_url="http://127.0.0.1:9")
+        report = reconcile(client, workers=2, min_age=timedelta(minutes=30))
+        self.assertEqual(report.checked, 7)
+        self.assertEqual(len(report.errors), 7)
+        self.assertEqual(Registration.objects.filter(payment_status="pending").count(), 8)
+
+    def test_verify_redirect(self):
+        previous, paystack._client = paystack._client, self.client_
+        try:
+            def verify(reference):
+                return self.client.get(reverse("verify-payment"), {"reference": reference}, HTTP_HOST="localhost")
+
+            self.assertEqual(verify("x-success-1").status_code, 200)
+            self.assertEqual(self.status_of("x-success-1"), "completed")
+            with self.assertLogs("registrations.payments", "WARNING"):
+                self.assertEqual(verify("x-success-short").status_code, 400)
+            self.assertEqual(self.status_of("x-success-short"), "pending")
+            self.assertEqual(verify("x-failed-1").status_code, 400)
+            self.assertEqual(self.status_of("x-failed-1"), "failed")
+            self.assertEqual(OutboundEmail.objects.count(), 2)
+        finally:
+            paystack._client = previous
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET_KEY)
+class PaystackWebhookTests(PaymentTestCase):
+    def post(self, event, signature=None):
+        body = json.dumps(event).encode()
+        if signature is None:
+            signature = hmac.new(SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+        return self.client.post(
+            reverse("paystack-webhook"), body, content_type="application/json",
+            HTTP_X_PAYSTACK_SIGNATURE=signature, HTTP_HOST="localhost",
+        )
+
+    def charge_success(self, reference, **data):
+        return {"event": "charge.success",
+                "data": {"reference": reference, "amount": 5000000, "currency": "NGN", **data}}
+
+    def test_bad_signature(self):
+        self.register("ref-1")
+        response = self.post(self.charge_success("ref-1"), signature="0" * 128)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.status_of("ref-1"), "pending")
+
+    def test_missing_signature(self):
+        self.register("ref-1")
+        response = self.post(self.charge_success("ref-1"), signature="")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.status_of("ref-1"), "pending")
+
+    def test_charge_success_completes_once(self):
+        self.register("ref-1")
+        self.assertEqual(self.post(self.charge_success("ref-1")).status_code, 200)
+        self.assertEqual(self.status_of("ref-1"), "completed")
+        # A redelivery is acknowledged without queuing the emails again
+        self.assertEqual(self.post(self.charge_success("ref-1")).status_code, 200)
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+
+    def test_mismatched_charge_is_not_applied(self):
+        self.register("ref-1")
+        self.register("ref-2")
+        with self.assertLogs("registrations.payments", "WARNING"):
+            self.assertEqual(self.post(self.charge_success("ref-1", amount=100)).status_code, 200)
+            self.assertEqual(self.post(self.charge_success("ref-2", currency="USD")).status_code, 200)
+        self.assertEqual(self.status_of("ref-1"), "pending")
+        self.assertEqual(self.status_of("ref-2"), "pending")
+        self.assertEqual(OutboundEmail.objects.count(), 0)
+
+    def test_non_object_payload(self):
+        self.assertEqual(self.post([{"event": "charge.success"}]).status_code, 400)
+        self.assertEqual(self.post({"event": "charge.success", "data": "ref-1"}).status_code, 200)
+
+    def test_other_events_are_ignored(self):
+        self.register("ref-1")
+        response = self.post({"event": "transfer.success", "data": {"reference": "ref-1"}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.status_of("ref-1"), "pending")
+
+
+class PaystackMetricsTests(TestCase):
+    def test_metrics_are_logged_periodically(self):
+        stub = StubPaystackServer().start()
+        try:
+            client = PaystackClient(secret_key="sk_test_stub", base_url=stub.url, metrics_log_interval=0.01)
+            client.verify_transaction("x-success-1")
+            client.stats._logged_at -= 1
+            with self.assertLogs("registrations.paystack", "INFO") as logs:
+                client.verify_transaction("x-success-2")
+            line = logs.records[-1].getMessage()
+            self.assertTrue(line.startswith("paystack_metrics "))
+            metrics = json.loads(line.split(" ", 1)[1])
+            self.assertEqual(metrics["circuit"], "closed")
+            self.assertEqual(metrics["operations"]["verify"]["calls"], 2)
+        finally:
+            stub.stop()
+
+
+class HealthCheckTests(TestCase):
+    def setUp(self):
+        self.previous = paystack._client
+        paystack._client = PaystackClient(secret_key="sk_test_stub", base_url="http://127.0.0.1:9")
+
+    def tearDown(self):
+        paystack._client = self.previous
+
+    def test_reports_only_circuit_state(self):
+        response = self.client.get(reverse("health-check"), HTTP_HOST="localhost")
+        self.assertEqual(response.json()["paystack"], "ok")
+
+        paystack._client.breaker.state = CircuitBreaker.OPEN
+        response = self.client.get(reverse("health-check"), HTTP_HOST="localhost")
+        self.assertEqual(response.json()["paystack"], "open")
+
+
+class RegistrationIdempotencyTests(PaymentTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubPaystackServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.previous, paystack._client = paystack._client, PaystackClient(secret_key="sk_test_stub", base_url=self.stub.url)
+
+    def tearDown(self):
+        paystack._client = self.previous
+
+    def submit(self, key=None, email="ada@fixlab.test"):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post(reverse("registrations-api"), {
+            "action": "newRegistration", "full_name": "Ada Obi", "email": email,
+            "phone": "08000000000", "course": self.course.name,
+        }, content_type="application/json", HTTP_HOST="localhost", **headers)
+
+    def test_double_submit_without_key(self):
+        first, second = self.submit(), self.submit()
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.json()["reference_no"], second.json()["reference_no"])
+        self.assertEqual(first.json()["payment_url"], second.json()["payment_url"])
+        self.assertEqual(Registration.objects.count(), 1)
+
+    def test_double_submit_with_key(self):
+        first, second = self.submit("click-1"), self.submit("click-1")
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.json()["reference_no"], second.json()["reference_no"])
+        # A new key is a new attempt
+        third = self.submit("click-2")
+        self.assertEqual(third.status_code, 201)
+        self.assertNotEqual(third.json()["reference_no"], first.json()["reference_no"])
+        self.assertEqual(Registration.objects.count(), 2)
+
+    def test_conflict_while_locked(self):
+        for key in (None, "click-1"):
+            stored = idempotency.registration_key(
+                mock.Mock(headers={"Idempotency-Key": key} if key else {}),
+                "newRegistration", "ada@fixlab.test", self.course,
+            )
+            self.assertTrue(idempotency.acquire(stored, "newRegistration", "ada@fixlab.test", self.course))
+            try:
+                self.assertEqual(self.submit(key).status_code, 409)
+            finally:
+                idempotency.release(stored, "newRegistration", "ada@fixlab.test", self.course)
+        self.assertEqual(Registration.objects.count(), 0)
+
+    def test_retry_after_failed_payment(self):
+        for key in (None, "click-1"):
+            first = self.submit(key).json()["reference_no"]
+            fail_payment(first)
+            retry = self.submit(key)
+            self.assertEqual(retry.status_code, 201)
+            self.assertNotEqual(retry.json()["reference_no"], first)
+            fail_payment(retry.json()["reference_no"])
+
+    def test_paid_registration_is_not_started_again(self):
+        complete_payment(self.submit().json()["reference_no"])
+        again = self.submit()
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()["message"], "This registration has already been paid.")
+        self.assertEqual(Registration.objects.count(), 1)
+
+    def test_database_rejects_duplicate_that_passed_the_lock(self):
+        first = self.submit().json()["reference_no"]
+        winner = idempotency.find_result(None, "ada@fixlab.test", self.course)
+        # Another process won the race: its row was not there yet when this one looked
+        with mock.patch.object(idempotency, "find_result", side_effect=[None, winner]):
+            second = self.submit()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["reference_no"], first)
+        self.assertEqual(Registration.objects.count(), 1)
+
+
+class CourseCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(name="Phone Repairs", amount=Decimal("50000.00"))
+
+    def test_lookups_are_served_from_memory(self):
+        self.assertEqual(catalog.get_course_by_name("Phone Repairs"), self.course)
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog.get_course_by_id(self.course.id), self.course)
+            self.assertIsNone(catalog.get_course_by_name("Unknown"))
+
+    def test_save_reloads_catalog(self):
+        catalog.get_catalog()
+        self.course.name = "Laptop Repairs"
+        self.course.amount = Decimal("60000.00")
+        self.course.save()
+        self.assertIsNone(catalog.get_course_by_name("Phone Repairs"))
+        self.assertEqual(catalog.get_course_by_name("Laptop Repairs").amount, Decimal("60000.00"))
+
+        Course.objects.create(name="Networking", amount=Decimal("1000.00"))
+        self.assertIsNotNone(catalog.get_course_by_name("Networking"))
+
+    def test_delete_reloads_catalog(self):
+        catalog.get_catalog()
+        course_id = self.course.id
+        self.course.delete()
+        self.assertIsNone(catalog.get_course_by_name("Phone Repairs"))
+        self.assertIsNone(catalog.get_course_by_id(course_id))
+
+    def test_version_bump_from_another_process(self):
+        snapshot = catalog.get_catalog()
+        # A save in another process only bumps the shared version
+        Course.objects.filter(id=self.course.id).update(name="Renamed")
+        self.assertIs(catalog.get_catalog(), snapshot)
+        catalog.bump_catalog_version()
+        self.assertEqual(catalog.get_course_by_id(self.course.id).name, "Renamed")
+
+    def test_course_list_follows_changes(self):
+        url = reverse("courses-api")
+        self.assertEqual(self.client.get(url, HTTP_HOST="localhost").json()["courses"][0]["name"], "Phone Repairs")
+        self.course.name = "Laptop Repairs"
+        self.course.save()
+        self.assertEqual(self.client.get(url, HTTP_HOST="localhost").json()["courses"][0]["name"], "Laptop Repairs")
+
+
+class PaymentReminderTests(PaymentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.transport = FakeTransport()
+        self.previous = set_transport(self.transport)
+        now = timezone.now()
+        self.register("due-new", age=timedelta(days=5))
+        self.register("too-recent", age=timedelta(days=1))
+        self.register("paid", status="completed", age=timedelta(days=5))
+        for reference, reminded, count in (
+            ("due-again", timedelta(days=4), 1),
+            ("reminded-lately", timedelta(days=1), 1),
+            ("reminded-enough", timedelta(days=10), 3),
+        ):
+            reg = self.register(reference, age=timedelta(days=20))
+            Registration.objects.filter(id=reg.id).update(last_reminded_at=now - reminded, reminder_count=count)
+
+    def tearDown(self):
+        set_transport(self.previous)
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("send_payment_reminders", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def reminded(self):
+        return sorted(message.to_email.split("@")[0] for message in self.transport.outbox)
+
+    def test_sends_only_due_reminders_once(self):
+        self.assertIn("due 2, sent 2, failed 0", self.run_command())
+        self.assertEqual(self.reminded(), ["due-again", "due-new"])
+        self.assertEqual(Registration.objects.get(reference_no="due-new").reminder_count, 1)
+        self.assertEqual(Registration.objects.get(reference_no="due-again").reminder_count, 2)
+        # One request for the course, each student's name as a substitution
+        self.assertEqual(self.transport.request_count, 1)
+        message = self.transport.outbox[0]
+        self.assertEqual(message.substitutions[text_token(NAME_TOKEN)], "Ada O'Brien")
+
+        self.assertIn("due 0, sent 0", self.run_command())
+        self.assertEqual(len(self.transport.outbox), 2)
+
+    def test_failed_send_is_retried(self):
+        # Both reminders share one SendGrid request, so both fail with it
+        self.transport.fail_for = {"due-new@fixlab.test"}
+        self.assertIn("due 2, sent 0, failed 2", self.run_command())
+        reg = Registration.objects.get(reference_no="due-new")
+        self.assertEqual((reg.reminder_count, reg.last_reminded_at), (0, None))
+        self.assertEqual(Registration.objects.get(reference_no="due-again").reminder_count, 1)
+
+        self.transport.fail_for = set()
+        self.assertIn("due 2, sent 2", self.run_command())
+
+    def test_dry_run_sends_nothing(self):
+        self.assertIn("2 reminders due", self.run_command("--dry-run"))
+        self.assertEqual(self.transport.outbox, [])
+        self.assertFalse(Registration.objects.filter(last_reminded_at__gt=timezone.now() - timedelta(hours=1)).exists())
@@ -1,10 +1,19 @@
 from django.urls import path
-from .views import RegistrationAPIView, PaymentVerificationAPIView, CheckUserAPIView, HealthCheckView
+from .views import (
+    RegistrationAPIView,
+    PaymentVerificationAPIView,
+    CheckUserAPIView,
+    CourseListAPIView,
+    HealthCheckView,
+    PaystackWebhookAPIView,
+)
 
 
 urlpatterns = [
     path('registrations/', RegistrationAPIView.as_view(), name='registrations-api'),
+    path('courses/', CourseListAPIView.as_view(), name='courses-api'),
     path("check-user", CheckUserAPIView.as_view(), name="check-user"),
     path('health/', HealthCheckView.as_view(), name='health-check'),
     path('verify-payment/', PaymentVerificationAPIView.as_view(), name='verify-payment'),
+    path('paystack/webhook/', PaystackWebhookAPIView.as_view(), name='paystack-webhook'),
 ]
@@ -1,22 +1,33 @@
+import json
+
 from django.views import View
 from django.http import JsonResponse
-from django.db import connections
+from django.db import IntegrityError, connections, transaction
 from django.db.utils import OperationalError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.conf import settings
 from django.core.cache import cache
-from datetime import datetime, timedelta
-import requests
 
-from .models import Registration, Course
+from . import idempotency
+from .catalog import get_catalog, get_course_by_name
+from .models import Registration
 from .serializers import RegistrationSerializer
-from .utils import send_email_via_sendgrid
+from .payments import (
+    apply_verification,
+    charge_matches,
+    complete_payment,
+    course_fee,
+    get_payment_status,
+    is_verified,
+    remember_verified,
+    to_kobo,
+    valid_signature,
+)
+from .paystack import CircuitBreaker, PaystackError, get_client
 
 
-PAYSTACK_INIT_URL = "https://api.paystack.co/transaction/initialize"
-PAYSTACK_VERIFY_URL = "https://api.paystack.co/transaction/verify/"
+PAYSTACK_CALLBACK_URL = "https://www.fixlabtech.com/payment-success"
 
 
 class HealthCheckView(View):
@@ -34,13 +45,28 @@ class HealthCheckView(View):
         except Exception:
             cache_status = "error"
 
+        # Only the breaker state; latency figures are not for a public endpoint
+        paystack_status = "ok" if get_client().breaker.state == CircuitBreaker.CLOSED else "open"
+
         overall_status = "ok" if db_status == "ok" and cache_status == "ok" else "error"
         return JsonResponse(
-            {"status": overall_status, "database": db_status, "cache": cache_status},
+            {
+                "status": overall_status,
+                "database": db_status,
+                "cache": cache_status,
+                "paystack": paystack_status,
+            },
             status=200 if overall_status == "ok" else 500,
         )
 
 
+class CourseListAPIView(APIView):
+    """ Public course list, served from the in-process catalog """
+
+    def get(self, request):
+        return Response({"success": True, "courses": get_catalog().listing()})
+
+
 class RegistrationAPIView(APIView):
     """
     Handles:
@@ -54,139 +80,134 @@ class RegistrationAPIView(APIView):
         email = data.get("email")
         course_name = data.get("course")
 
-        try:
-            course_obj = Course.objects.get(name=course_name)
-        except Course.DoesNotExist:
+        course_obj = get_course_by_name(course_name)
+        if course_obj is None:
             return Response(
                 {"success": False, "message": "Course not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if action == "newRegistration":
-            payload = {
-                "email": email,
-                "amount": int(course_obj.amount * 100),
-                "callback_url": "https://www.fixlabtech.com/payment-success",
-            }
-            headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-            try:
-                r = requests.post(PAYSTACK_INIT_URL, json=payload, headers=headers, timeout=10)
-                res = r.json()
-            except Exception as e:
-                return Response(
-                    {"success": False, "message": f"Paystack init error: {str(e)}"},
-                    status=status.HTTP_502_BAD_GATEWAY,
-                )
-
-            if not res.get("status"):
-                return Response(
-                    {"success": False, "message": res.get("message", "Paystack init failed")},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            reference_no = res["data"]["reference"]
-            auth_url = res["data"]["authorization_url"]
-
-            serializer = RegistrationSerializer(data={
-                "full_name": data.get("full_name"),
-                "gender": data.get("gender"),
-                "email": email,
-                "phone": data.get("phone"),
-                "address": data.get("address"),
-                "occupation": data.get("occupation"),
-                "course": course_obj.name,
-                "reference_no": reference_no,
-                "message": data.get("message", "")
-            })
-            if serializer.is_valid():
-                serializer.save(payment_status="pending")
-                return Response({
-                    "success": True,
-                    "payment_url": auth_url,
-                    "reference_no": reference_no,
-                    "message": "Registration created. Redirect to Paystack to complete payment."
-                }, status=status.HTTP_201_CREATED)
-            return Response({"success": False, "message": serializer.errors},
-                            status=status.HTTP_400_BAD_REQUEST)
+        if action not in ("newRegistration", "newCourse"):
+            return Response({"success": False, "message": "Invalid action."}, status=status.HTTP_400_BAD_REQUEST)
 
-        elif action == "newCourse":
+        existing = None
+        if action == "newCourse":
             existing = Registration.objects.filter(email=email).first()
             if not existing:
                 return Response({"success": False, "message": "Student not found. Register first."},
                                 status=status.HTTP_404_NOT_FOUND)
 
-            payload = {
-                "email": email,
-                "amount": int(course_obj.amount * 100),
-                "callback_url": "https://www.fixlabtech.com/payment-success",
-            }
-            headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-            r = requests.post(PAYSTACK_INIT_URL, json=payload, headers=headers)
-            res = r.json()
-            if not res.get("status"):
-                return Response({"success": False, "message": "Paystack init failed"},
-                                status=status.HTTP_400_BAD_REQUEST)
-
-            reference_no = res["data"]["reference"]
-            auth_url = res["data"]["authorization_url"]
-
-            Registration.objects.create(
-                full_name=existing.full_name,
-                gender=existing.gender,
-                email=existing.email,
-                phone=existing.phone,
-                address=existing.address,
-                occupation=existing.occupation,
-                course=course_obj,
-                payment_status="pending",
-                reference_no=reference_no,
-                message=data.get("message", existing.message)
+        # Repeated submissions get the first attempt's reference and payment_url
+        # back; they are matched before Paystack is called
+        key = idempotency.registration_key(request, action, email, course_obj)
+        if not idempotency.acquire(key, action, email, course_obj):
+            return self._replay_or_conflict(key, email, course_obj)
+        try:
+            result = idempotency.find_result(key, email, course_obj)
+            if result is not None:
+                return Response(result)
+            if action == "newRegistration":
+                return self._new_registration(key, data, email, course_obj)
+            return self._new_course(key, data, existing, course_obj)
+        finally:
+            idempotency.release(key, action, email, course_obj)
+
+    def _initialize_payment(self, email, course_obj):
+        """ (reference, authorization_url) from Paystack, or an error Response """
+        try:
+            res = get_client().initialize_transaction(
+                email, to_kobo(course_obj.amount), PAYSTACK_CALLBACK_URL
+            )
+        except PaystackError as e:
+            return Response(
+                {"success": False, "message": f"Paystack init error: {str(e)}"},
+                status=status.HTTP_502_BAD_GATEWAY,
+            )
+
+        if not res.get("status"):
+            return Response(
+                {"success": False, "message": res.get("message", "Paystack init failed")},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            return Response({
-                "success": True,
-                "payment_url": auth_url,
-                "reference_no": reference_no,
-                "message": f"New course {course_obj.name} registered. Proceed to payment."
-            })
+        return res["data"]["reference"], res["data"]["authorization_url"]
+
+    def _new_registration(self, key, data, email, course_obj):
+        payment = self._initialize_payment(email, course_obj)
+        if isinstance(payment, Response):
+            return payment
+        reference_no, auth_url = payment
+
+        serializer = RegistrationSerializer(data={
+            "full_name": data.get("full_name"),
+            "gender": data.get("gender"),
+            "email": email,
+            "phone": data.get("phone"),
+            "address": data.get("address"),
+            "occupation": data.get("occupation"),
+            "course": course_obj.name,
+            "reference_no": reference_no,
+            "message": data.get("message", "")
+        })
+        if not serializer.is_valid():
+            return Response({"success": False, "message": serializer.errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                reg = serializer.save(payment_status="pending", payment_url=auth_url,
+                                      idempotency_key=key or idempotency.window_key("newRegistration", email, course_obj))
+        except IntegrityError:
+            # A duplicate slipped past the lock (per-process cache, or it expired); answer with the winner
+            return self._replay_or_conflict(key, email, course_obj)
+
+        result = idempotency.payment_result(reg, "Registration created. Redirect to Paystack to complete payment.")
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    def _new_course(self, key, data, existing, course_obj):
+        payment = self._initialize_payment(existing.email, course_obj)
+        if isinstance(payment, Response):
+            return payment
+        reference_no, auth_url = payment
+
+        try:
+            with transaction.atomic():
+                reg = Registration.objects.create(
+                    full_name=existing.full_name,
+                    gender=existing.gender,
+                    email=existing.email,
+                    phone=existing.phone,
+                    address=existing.address,
+                    occupation=existing.occupation,
+                    course=course_obj,
+                    payment_status="pending",
+                    reference_no=reference_no,
+                    payment_url=auth_url,
+                    idempotency_key=key or idempotency.window_key("newCourse", existing.email, course_obj),
+                    message=data.get("message", existing.message)
+                )
+        except IntegrityError:
+            return self._replay_or_conflict(key, existing.email, course_obj)
 
-        return Response({"success": False, "message": "Invalid action."}, status=status.HTTP_400_BAD_REQUEST)
+        result = idempotency.payment_result(reg, f"New course {course_obj.name} registered. Proceed to payment.")
+        return Response(result)
 
     @staticmethod
-    def send_pending_payment_reminders():
-        four_days_ago = datetime.now() - timedelta(days=4)
-        pending_regs = Registration.objects.filter(
-            payment_status="pending", created_at__lte=four_days_ago
-        )
-        for reg in pending_regs:
-            subject = f"🔔 Payment Reminder - {reg.course.name}"
-            message = f"""
-<div style="font-family:Arial, sans-serif; background-color:#f4f6f8; padding:20px;">
-  <div style="max-width:600px; margin:auto; background-color:#ffffff; border-radius:8px; overflow:hidden; border:1px solid #ddd;">
-    <div style="background-color:#0b5394; color:#fff; padding:15px; text-align:center; font-size:20px;">Fixlab Academy</div>
-    <div style="padding:20px; color:#333;">
-      <h2 style="color:#0b5394;">Payment Reminder</h2>
-      <p>Hello <strong>{reg.full_name}</strong>,</p>
-      <p>We noticed your payment for <strong>{reg.course.name}</strong> is still pending.</p>
-      <table style="border-collapse: collapse; width: 100%;">
-        <tr style="background-color:#e6f2ff;">
-          <td style="padding:8px; border:1px solid #ccc;"><strong>Reference:</strong></td>
-          <td style="padding:8px; border:1px solid #ccc;">{reg.reference_no}</td>
-        </tr>
-      </table>
-      <p>Please complete your payment to confirm your registration.</p>
-      <p>Thank you,<br><strong>Fixlab Academy Team</strong></p>
-    </div>
-    <div style="background-color:#0b5394; color:#fff; text-align:center; padding:10px; font-size:12px;">
-      &copy; {datetime.now().year} Fixlab Academy. All rights reserved.
-    </div>
-  </div>
-</div>
-"""
-            send_email_via_sendgrid(subject, message, reg.email)
+    def _replay_or_conflict(key, email, course_obj):
+        result = idempotency.find_result(key, email, course_obj)
+        if result is not None:
+            return Response(result)
+        return Response({"success": False, "message": "This registration is already being processed."},
+                        status=status.HTTP_409_CONFLICT)
 
 
 class PaymentVerificationAPIView(APIView):
-    """ Verifies Paystack transaction and sends notifications after success """
+    """
+    Answers Paystack's browser redirect with the payment outcome.
+
+    The charge.success webhook has normally settled the registration by the
+    time the browser lands here, so this only asks Paystack itself while the
+    row is still unresolved.
+    """
 
     def get(self, request):
         reference_no = request.query_params.get("reference") or request.query_params.get("trxref")
@@ -194,117 +215,68 @@ class PaymentVerificationAPIView(APIView):
             return Response({"success": False, "message": "Reference required."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-        r = requests.get(f"{PAYSTACK_VERIFY_URL}{reference_no}", headers=headers)
-        res = r.json()
+        if is_verified(reference_no):
+            # Page refresh after a settled payment: no query, no Paystack call
+            return Response({"success": True, "message": "Payment verified and emails sent."})
 
-        try:
-            reg = Registration.objects.get(reference_no=reference_no)
-        except Registration.DoesNotExist:
+        payment_status = get_payment_status(reference_no)
+        if payment_status is None:
             return Response({"success": False, "message": "Registration not found."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        if res.get("status") and res["data"]["status"] == "success":
-            reg.payment_status = "completed"
-            reg.save()
-            self._send_payment_notifications(reg)
+        if payment_status != "completed":
+            try:
+                res = get_client().verify_transaction(reference_no)
+            except PaystackError as e:
+                return Response({"success": False, "message": f"Paystack verify error: {str(e)}"},
+                                status=status.HTTP_502_BAD_GATEWAY)
+            payment_status = apply_verification(reference_no, res)
+
+        if payment_status == "completed":
+            remember_verified([reference_no])
             return Response({"success": True, "message": "Payment verified and emails sent."})
-
-        reg.payment_status = "failed"
-        reg.save()
+        if payment_status == "pending":
+            return Response({"success": False, "message": "Payment is still being processed. Please check again shortly."},
+                            status=status.HTTP_400_BAD_REQUEST)
         return Response({"success": False, "message": "Payment failed."},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    def _send_payment_notifications(self, reg):
-        completed_courses = Registration.objects.filter(email=reg.email, payment_status="completed").exclude(id=reg.id)
-
-        if completed_courses.exists():
-            student_subject = f"Course Registration)"
-            student_msg = self._build_email_html(
-                title="Payment Confirmed",
-                greeting=reg.full_name,
-                message=f"Your payment for the <strong>additional course {reg.course.name}</strong> has been successfully received.<p><b> Registration Details: </p>",
-                table_rows=[
-                    ("Course", reg.course.name),
-                    ("Amount Paid", f"₦{reg.course.amount}"),
-                    ("Reference No.", reg.reference_no),
-                    ("Date", reg.created_at.strftime("%d %B %Y, %I:%M %p"))
-                ],
-                footer="Thank you for continuing your learning journey with <strong>Fixlab Acade-my, your LMS account will be updated with the new course within 24 hours</strong>.<br><i>Thank you!</i>"
-            )
-            support_subject = f"New Course Payment Received - {reg.full_name}"
-            support_msg = self._build_email_html(
-                title="New Course Payment Received",
-                greeting=None,
-                message=f"Student <strong>{reg.full_name}</strong> has successfully paid for a new course.<p><b> Registration Details: </b></p>",
-                table_rows=[
-                    ("Course", reg.course.name),
-                    ("Amount Paid", f"₦{reg.course.amount}"),
-                    ("Reference", reg.reference_no),
-                    ("Date", reg.created_at.strftime("%d %B %Y, %I:%M %p"))
-                ],
-                footer="Update student LMS account with the new course within 24 hours."
-            )
-        else:
-            student_subject = f"Course Registration"
-            student_msg = self._build_email_html(
-                title="Payment Confirmed",
-                greeting=reg.full_name,
-                message=f"Your registration for <strong>{reg.course.name}</strong> has been confirmed.<p><b> Registration Details: </b></p>",
-                table_rows=[
-                    ("Course", reg.course.name),
-                    ("Amount Paid", f"₦{reg.course.amount}"),
-                    ("Reference No.", reg.reference_no),
-                    ("Date", reg.created_at.strftime("%d %B %Y, %I:%M %p"))
-                ],
-                footer="Our academic support team will contact you within 24 hours with your LMS credentials and schedule. <br><i>Thank you!</i>"
-            )
-            support_subject = f"New Registration Received"
-            support_msg = self._build_email_html(
-                title="New Registration Payment Received",
-                greeting=None,
-                message=f"A new student has successfully registered and paid.<p><b> Registration Details:</p>",
-                table_rows=[
-                    ("Name", reg.full_name),
-                    ("Email", reg.email),
-                    ("Phone", reg.phone),
-                    ("Course", reg.course.name),
-                    ("Amount Paid", f"₦{reg.course.amount}"),
-                    ("Reference", reg.reference_no),
-                    ("Date", reg.created_at.strftime("%d %B %Y, %I:%M %p"))
-                ],
-                footer="Create a new LMS account and send credentials within 24 hours."
-            )
 
-        send_email_via_sendgrid(student_subject, student_msg, reg.email)
-        send_email_via_sendgrid(support_subject, support_msg, "support@fixlabtech.freshdesk.com")
+class PaystackWebhookAPIView(APIView):
+    """
+    Paystack event webhook. The signature is checked locally against the raw
+    body; charge.success settles the registration without any call back to
+    Paystack, provided it paid the full course fee in naira. Other events are
+    acknowledged and ignored.
+    """
+    authentication_classes = []
+    permission_classes = []
 
-    @staticmethod
-    def _build_email_html(title, greeting, message, table_rows, footer):
-        table_html = "".join(
-            f'<tr style="background-color:#e6f2ff;"><td style="padding:8px; border:1px solid #ccc;">{k}</td>'
-            f'<td style="padding:8px; border:1px solid #ccc;">{v}</td></tr>'
-            for k, v in table_rows
-        )
-        greeting_html = f"<p>Hello <strong>{greeting}</strong>,</p>" if greeting else ""
-        html = f"""
-<div style="font-family:Arial, sans-serif; background-color:#f4f6f8; padding:20px;">
-  <div style="max-width:600px; margin:auto; background-color:#ffffff; border-radius:8px; overflow:hidden; border:1px solid #ddd;">
-    <div style="background-color:#0b5394; color:#fff; padding:15px; text-align:center; font-size:20px;">Fixlab Academy</div>
-    <div style="padding:20px; color:#333;">
-      <h2 style="color:#0b5394;">{title}</h2>
-      {greeting_html}
-      <p>{message}</p>
-      <table style="border-collapse: collapse; width: 100%;">{table_html}</table>
-      <p>{footer}</p>
-    </div>
-    <div style="background-color:#0b5394; color:#fff; text-align:center; padding:10px; font-size:12px;">
-      &copy; {datetime.now().year} Fixlab Academy. All rights reserved.
-    </div>
-  </div>
-</div>
-"""
-        return html
+    def post(self, request):
+        payload = request.body
+        if not valid_signature(payload, request.headers.get("x-paystack-signature", "")):
+            return Response({"success": False, "message": "Invalid signature."},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return Response({"success": False, "message": "Invalid payload."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not isinstance(event, dict):
+            return Response({"success": False, "message": "Invalid payload."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        data = event.get("data")
+        if event.get("event") == "charge.success" and isinstance(data, dict):
+            reference_no = data.get("reference")
+            # A short or foreign-currency charge stays pending for the team to review
+            if reference_no and charge_matches(data, course_fee(reference_no)):
+                complete_payment(reference_no)
+
+        # Acknowledge quickly; Paystack retries anything that is not a 200
+        return Response({"success": True})
 
 
 class CheckUserAPIView(APIView):
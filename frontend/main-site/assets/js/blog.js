@@ -97,7 +97,7 @@ document.addEventListener("DOMContentLoaded", function () {
                         <a class="d-inline-block" href="blog_details.html?id=${blog.id}">
                             <h2>${blog.title}</h2>
                         </a>
-                        <p>${(blog.content || "").substring(0, 150)}...</p>
+                        <p>${blog.excerpt || ""}</p>
                         <ul class="blog-info-link">
                             <li><i class="fa fa-user"></i> ${blog.author || "Unknown"}</li>
                             <p><i class="fa fa-comments"></i> ${blog.comments_count || 0} Comments</p>
@@ -33,6 +33,86 @@ document.addEventListener("DOMContentLoaded", function () {
         return dateStr ? new Date(dateStr).toLocaleDateString() : "Unknown Date";
     }
 
+    // ----------------- COMMENTS -----------------
+    // The post payload embeds only the first few comments plus comments_count;
+    // the rest are paged from the comments endpoint.
+    const COMMENTS_URL = `${API_BASE}${postId}/comments/`;
+    const shownCommentIds = new Set();
+    let commentsTotal = 0;
+    let nextCommentsUrl = null;
+
+    const loadMoreComments = document.createElement("button");
+    loadMoreComments.type = "button";
+    loadMoreComments.className = "button button-contactForm btn_1 boxed-btn";
+    loadMoreComments.textContent = "Load more comments";
+    loadMoreComments.style.display = "none";
+    commentsList.after(loadMoreComments);
+    loadMoreComments.addEventListener("click", () => fetchComments(nextCommentsUrl));
+
+    function renderComment(c) {
+        if (shownCommentIds.has(c.id)) return;
+        shownCommentIds.add(c.id);
+        const div = document.createElement("div");
+        div.classList.add("comment-list");
+        div.innerHTML = `
+            <div class="single-comment justify-content-between d-flex">
+                <div class="user justify-content-between d-flex">
+                    <div class="thumb">
+                        <img src="assets/img/blog/comment.png" alt="commenter">
+                    </div>
+                    <div class="desc">
+                        <p class="comment">${c.content}</p>
+                        <div class="d-flex justify-content-between">
+                            <div class="d-flex align-items-center">
+                                <h5><a href="#">${c.name}</a></h5>
+                                <p class="date">${formatDate(c.created_at)}</p>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            </div>`;
+        commentsList.appendChild(div);
+    }
+
+    function updateComments() {
+        commentsTotal = Math.max(commentsTotal, shownCommentIds.size);
+        if (!shownCommentIds.size) {
+            commentsList.innerHTML = "<p>No comments yet. Be the first!</p>";
+        }
+        commentCount.textContent = `${commentsTotal} Comments`;
+        loadMoreComments.style.display = nextCommentsUrl ? "" : "none";
+    }
+
+    function resetComments(total) {
+        commentsList.innerHTML = "";
+        shownCommentIds.clear();
+        commentsTotal = total || 0;
+    }
+
+    function loadComments(comments, total) {
+        resetComments(total);
+        comments.forEach(renderComment);
+        // Start paging from the top; comments already shown are skipped
+        nextCommentsUrl = shownCommentIds.size < commentsTotal ? COMMENTS_URL : null;
+        updateComments();
+    }
+
+    function fetchComments(url) {
+        if (!url) return;
+        loadMoreComments.disabled = true;
+        fetch(url)
+            .then(res => res.json())
+            .then(resp => {
+                const page = resp.data || {};
+                if (!shownCommentIds.size) commentsList.innerHTML = "";
+                (page.results || []).forEach(renderComment);
+                nextCommentsUrl = page.next || null;
+                updateComments();
+            })
+            .catch(err => Swal.fire("Error", err.message, "error"))
+            .finally(() => { loadMoreComments.disabled = false; });
+    }
+
     // ----------------- FETCH SINGLE POST -----------------
     fetch(`${API_BASE}${postId}/`)
         .then(res => res.json())
@@ -45,36 +125,7 @@ document.addEventListener("DOMContentLoaded", function () {
             postAuthor.textContent = blog.author || "Unknown";
             postContent.textContent = blog.content || "No content available.";
 
-            const comments = blog.comments || [];
-            commentsList.innerHTML = "";
-            if (!comments.length) {
-                commentsList.innerHTML = "<p>No comments yet. Be the first!</p>";
-                commentCount.textContent = "0 Comments";
-            } else {
-                comments.forEach(c => {
-                    const div = document.createElement("div");
-                    div.classList.add("comment-list");
-                    div.innerHTML = `
-                        <div class="single-comment justify-content-between d-flex">
-                            <div class="user justify-content-between d-flex">
-                                <div class="thumb">
-                                    <img src="assets/img/blog/comment.png" alt="commenter">
-                                </div>
-                                <div class="desc">
-                                    <p class="comment">${c.content}</p>
-                                    <div class="d-flex justify-content-between">
-                                        <div class="d-flex align-items-center">
-                                            <h5><a href="#">${c.name}</a></h5>
-                                            <p class="date">${formatDate(c.created_at)}</p>
-                                        </div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>`;
-                    commentsList.appendChild(div);
-                });
-                commentCount.textContent = `${comments.length} Comments`;
-            }
+            loadComments(blog.comments || [], blog.comments_count);
         })
         .catch(err => Swal.fire("Error", err.message, "error"));
 
@@ -111,36 +162,9 @@ document.addEventListener("DOMContentLoaded", function () {
             Swal.fire("Success", "Comment posted successfully!", "success");
             commentForm.reset();
 
-            // Refresh comments
-            fetch(`${API_BASE}${postId}/`)
-                .then(res => res.json())
-                .then(resp => {
-                    const comments = resp.data.comments || [];
-                    commentsList.innerHTML = "";
-                    comments.forEach(c => {
-                        const div = document.createElement("div");
-                        div.classList.add("comment-list");
-                        div.innerHTML = `
-                            <div class="single-comment justify-content-between d-flex">
-                                <div class="user justify-content-between d-flex">
-                                    <div class="thumb">
-                                        <img src="assets/img/blog/comment.png" alt="commenter">
-                                    </div>
-                                    <div class="desc">
-                                        <p class="comment">${c.content}</p>
-                                        <div class="d-flex justify-content-between">
-                                            <div class="d-flex align-items-center">
-                                                <h5><a href="#">${c.name}</a></h5>
-                                                <p class="date">${formatDate(c.created_at)}</p>
-                                            </div>
-                                        </div>
-                                    </div>
-                                </div>
-                            </div>`;
-                        commentsList.appendChild(div);
-                    });
-                    commentCount.textContent = `${comments.length} Comments`;
-                });
+            // Reload from the comments endpoint; the post payload may be cached
+            resetComments(commentsTotal + 1);
+            fetchComments(COMMENTS_URL);
         })
         .catch(err => Swal.fire("Error", err.message, "error"));
     });
@@ -100,7 +100,7 @@ document.addEventListener("DOMContentLoaded", function () {
                     <p>${secondHalf}</p>
                 `;
 
-                loadComments(blog.comments || []);
+                loadComments(blog.comments || [], blog.comments_count);
 
                 // Load tags
                 if (tagList) {
@@ -118,34 +118,81 @@ document.addEventListener("DOMContentLoaded", function () {
             .catch(() => Swal.fire("Error", "Failed to load blog post.", "error"));
     }
 
-    function loadComments(comments) {
-        commentsList.innerHTML = "";
-        if (!comments.length) {
-            commentsList.innerHTML = "<p>No comments yet. Be the first!</p>";
-            commentCount.textContent = "0 Comments";
-            return;
-        }
+    // ----------------- COMMENTS -----------------
+    // The post payload embeds only the first few comments plus comments_count;
+    // the rest are paged from the comments endpoint.
+    const COMMENTS_URL = `${API_BASE}${postId}/comments/`;
+    const shownCommentIds = new Set();
+    let commentsTotal = 0;
+    let nextCommentsUrl = null;
 
-        comments.forEach(c => {
-            const div = document.createElement("div");
-            div.classList.add("comment-list");
-            div.innerHTML = `
-                <div class="single-comment justify-content-between d-flex">
-                    <div class="user justify-content-between d-flex">
-                        <div class="desc">
-                            <p class="comment">${c.content}</p>
-                            <div class="d-flex justify-content-between">
-                                <div class="d-flex align-items-center">
-                                    <h5><a href="#">${c.name || "Anonymous"}</a></h5>
-                                    <p class="date">${formatDate(c.created_at)}</p>
-                                </div>
+    const loadMoreComments = document.createElement("button");
+    loadMoreComments.type = "button";
+    loadMoreComments.className = "button button-contactForm btn_1 boxed-btn";
+    loadMoreComments.textContent = "Load more comments";
+    loadMoreComments.style.display = "none";
+    commentsList.after(loadMoreComments);
+    loadMoreComments.addEventListener("click", () => fetchComments(nextCommentsUrl));
+
+    function renderComment(c) {
+        if (shownCommentIds.has(c.id)) return;
+        shownCommentIds.add(c.id);
+        const div = document.createElement("div");
+        div.classList.add("comment-list");
+        div.innerHTML = `
+            <div class="single-comment justify-content-between d-flex">
+                <div class="user justify-content-between d-flex">
+                    <div class="desc">
+                        <p class="comment">${c.content}</p>
+                        <div class="d-flex justify-content-between">
+                            <div class="d-flex align-items-center">
+                                <h5><a href="#">${c.name || "Anonymous"}</a></h5>
+                                <p class="date">${formatDate(c.created_at)}</p>
                             </div>
                         </div>
                     </div>
-                </div>`;
-            commentsList.appendChild(div);
-        });
-        commentCount.textContent = `${comments.length} Comments`;
+                </div>
+            </div>`;
+        commentsList.appendChild(div);
+    }
+
+    function updateComments() {
+        commentsTotal = Math.max(commentsTotal, shownCommentIds.size);
+        if (!shownCommentIds.size) {
+            commentsList.innerHTML = "<p>No comments yet. Be the first!</p>";
+        }
+        commentCount.textContent = `${commentsTotal} Comments`;
+        loadMoreComments.style.display = nextCommentsUrl ? "" : "none";
+    }
+
+    function resetComments(total) {
+        commentsList.innerHTML = "";
+        shownCommentIds.clear();
+        commentsTotal = total || 0;
+    }
+
+    function loadComments(comments, total) {
+        resetComments(total);
+        comments.forEach(renderComment);
+        // Start paging from the top; comments already shown are skipped
+        nextCommentsUrl = shownCommentIds.size < commentsTotal ? COMMENTS_URL : null;
+        updateComments();
+    }
+
+    function fetchComments(url) {
+        if (!url) return;
+        loadMoreComments.disabled = true;
+        fetch(url)
+            .then(res => res.json())
+            .then(resp => {
+                const page = resp.data || {};
+                if (!shownCommentIds.size) commentsList.innerHTML = "";
+                (page.results || []).forEach(renderComment);
+                nextCommentsUrl = page.next || null;
+                updateComments();
+            })
+            .catch(() => Swal.fire("Error", "Failed to load comments.", "error"))
+            .finally(() => { loadMoreComments.disabled = false; });
     }
 
     // ----------------- SUBMIT COMMENT -----------------
@@ -169,11 +216,16 @@ document.addEventListener("DOMContentLoaded", function () {
                 },
                 body: JSON.stringify({ post: postId, name, email, content: comment })
             })
-            .then(res => res.json())
+            .then(res => {
+                if (!res.ok) throw new Error("Failed to post comment");
+                return res.json();
+            })
             .then(() => {
                 Swal.fire("Success", "Comment posted successfully!", "success");
                 commentForm.reset();
-                fetchPost();
+                // Reload from the comments endpoint; the post payload may be cached
+                resetComments(commentsTotal + 1);
+                fetchComments(COMMENTS_URL);
             })
             .catch(() => Swal.fire("Error", "Failed to post comment.", "error"));
         });